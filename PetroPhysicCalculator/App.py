@@ -1,22 +1,47 @@
+import time
+START_TIME = time.perf_counter()
 import os
-from PySide6.QtWidgets import QApplication
-from MainWindow import MainWindow
 import sys
 
+# Time from process start to the first painted window, reported on stdout.
+# Override with PETRO_STARTUP_BUDGET_MS.
+STARTUP_BUDGET_MS = 1500
+
+
+def report_startup(budget_ms):
+    from Tracer import tracer
+    now = time.perf_counter()
+    tracer.add('startup', START_TIME, now, 'app')
+    elapsed_ms = (now - START_TIME) * 1000
+    if elapsed_ms > budget_ms:
+        print(f"Startup took {elapsed_ms:.0f} ms, over the {budget_ms} ms budget")
+    else:
+        print(f"Startup took {elapsed_ms:.0f} ms (budget {budget_ms} ms)")
+
+
 def main():
+    # Qt and the window are imported here rather than at module level; VisPy
+    # and lasio are only imported once a file is opened
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from MainWindow import MainWindow
+
     app = QApplication(sys.argv)
-    
+
     # Get the directory of the current script
     script_dir = os.path.dirname(os.path.realpath(__file__))
     style_path = os.path.join(script_dir, 'style.qss')
-    
+
     # Load the stylesheet
     with open(style_path, 'r') as f:
         stylesheet = f.read()
     app.setStyleSheet(stylesheet)
-    
+
     mainWin = MainWindow()
     mainWin.show()
+    # Runs once the event loop has painted the window
+    budget_ms = int(os.environ.get('PETRO_STARTUP_BUDGET_MS', STARTUP_BUDGET_MS))
+    QTimer.singleShot(0, lambda: report_startup(budget_ms))
     sys.exit(app.exec())
 
 if __name__ == '__main__':
@@ -0,0 +1,142 @@
+import os
+import sys
+import csv
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from LasData import LasData
+from LasCache import LasCache
+
+# Headless entry point: no Qt or VisPy imports here, so worker processes start fast.
+
+STATS = ['count', 'mean', 'std', 'min', 'max']
+DEFAULT_CURVES = ['GRZ', 'PORD', 'ZDEN']
+
+
+def find_las_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, '**', '*.[lL][aA][sS]'), recursive=True))
+        else:
+            files.extend(glob.glob(path))
+    return sorted(set(files))
+
+
+def parse_interval(text):
+    top, sep, base = text.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Interval must be TOP:BASE, got '{text}'")
+    try:
+        return float(top), float(base)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Interval must be TOP:BASE, got '{text}'")
+
+
+def read_intervals_file(path):
+    # CSV with top and base columns; a header row is optional
+    intervals = []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            try:
+                intervals.append((float(row[0]), float(row[1])))
+            except ValueError:
+                continue
+    return intervals
+
+
+def well_stats(filename, intervals, curves=DEFAULT_CURVES, cache_dir=None):
+    # Rows of per-interval statistics for one well; runs in a worker process.
+    # Only the requested curves are parsed, stored as float32; depth stays
+    # float64 so interval membership matches the GUI. Each curve's statistics
+    # skip only its own nulls, whatever else was requested.
+    las_data = LasData(cache=LasCache(cache_dir) if cache_dir else None,
+                       curves=curves, dtype=np.float32, plot_rows=False)
+    las_data.load(filename)
+    if intervals:
+        tops, bases = np.array(intervals, dtype=float).T
+    else:
+        tops = np.array([np.nanmin(las_data.depth)])
+        bases = np.array([np.nanmax(las_data.depth)])
+    stats = las_data.stats(tops, bases, curves)
+
+    rows = []
+    for k in range(len(tops)):
+        row = {'file': filename, 'well': las_data.well.get('WELL', ''), 'top': float(tops[k]), 'base': float(bases[k])}
+        for curve in curves:
+            for stat in STATS:
+                # Curves the well lacks are reported as empty
+                row[f'{curve}_{stat}'] = stats[curve][stat][k].item() if curve in stats else None
+        rows.append(row)
+    return rows
+
+
+def _well_stats_safe(args):
+    filename, intervals, curves, cache_dir = args
+    try:
+        return filename, well_stats(filename, intervals, curves, cache_dir), None
+    except Exception as e:
+        return filename, [], str(e)
+
+
+def write_table(rows, output, curves=DEFAULT_CURVES):
+    columns = ['file', 'well', 'top', 'base'] + [f'{c}_{s}' for c in curves for s in STATS]
+    if output.lower().endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('Writing Parquet requires pyarrow (pip install pyarrow)')
+        table = pa.table({c: [row[c] for row in rows] for c in columns})
+        pq.write_table(table, output)
+        return
+    with open(output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute curve statistics per depth interval for many LAS files.')
+    parser.add_argument('paths', nargs='+', help='LAS files, directories or glob patterns')
+    parser.add_argument('-i', '--interval', action='append', type=parse_interval, default=[],
+                        metavar='TOP:BASE', help='depth interval (repeatable); defaults to the whole well')
+    parser.add_argument('--intervals-file', help='CSV file of top,base rows')
+    parser.add_argument('-c', '--curves', default=','.join(DEFAULT_CURVES),
+                        help='comma-separated curve mnemonics (aliases such as GR or RHOB are matched)')
+    parser.add_argument('-o', '--output', default='zone_stats.csv', help='output .csv or .parquet file')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--cache-dir', help='reuse/populate a LasCache directory')
+    args = parser.parse_args(argv)
+
+    intervals = list(args.interval)
+    if args.intervals_file:
+        intervals.extend(read_intervals_file(args.intervals_file))
+    files = find_las_files(args.paths)
+    if not files:
+        print('No LAS files found', file=sys.stderr)
+        return 1
+
+    rows = []
+    failures = 0
+    curves = [c.strip().upper() for c in args.curves.split(',') if c.strip()]
+    jobs = [(f, intervals, curves, args.cache_dir) for f in files]
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for filename, well_rows, error in pool.map(_well_stats_safe, jobs, chunksize=chunksize):
+            if error is not None:
+                failures += 1
+                print(f"Error reading LAS file {filename}: {error}", file=sys.stderr)
+            rows.extend(well_rows)
+
+    write_table(rows, args.output, curves)
+    print(f"Wrote {len(rows)} rows for {len(files) - failures} wells to {args.output}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
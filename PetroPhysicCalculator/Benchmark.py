@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+from LasData import LasData
+from LasCache import LasCache
+from LodPyramid import LodPyramid
+from Export import write_las_header, write_las_rows
+from Petrophysics import derive_curves
+
+# Benchmarks for the load, query and draw-preparation paths on synthetic LAS
+# files. Results are written as JSON so runs can be compared for regressions:
+#
+#   python Benchmark.py --sizes 10000,1000000 --output bench.json
+#   python Benchmark.py --sizes 10000,1000000 --compare bench.json
+
+BASE_CURVES = ['DEPT', 'GRZ', 'PORD', 'ZDEN']
+WRITE_CHUNK = 100000  # rows generated per write; fixed so files are identical across versions
+
+
+def write_synthetic_las(path, n_samples, n_curves=4, null_fraction=0.02, step=0.1, seed=0):
+    # LAS 2.0 file with DEPT/GRZ/PORD/ZDEN plus extra curves up to n_curves,
+    # and roughly null_fraction of the non-depth values set to NULL
+    rng = np.random.default_rng(seed)
+    names = BASE_CURVES + [f'CRV{k}' for k in range(max(n_curves - len(BASE_CURVES), 0))]
+    names = names[:max(n_curves, 2)]
+    top = 1000.0
+    with open(path, 'w') as f:
+        # Written like Export writes a LAS file, chunk by chunk
+        units = {name: 'FT' if name == 'DEPT' else 'UNIT' for name in names}
+        write_las_header(f, names, units, {'WELL': 'SYNTHETIC WELL'}, -999.25,
+                         top, top + step * (n_samples - 1), step)
+        for start in range(0, n_samples, WRITE_CHUNK):
+            n = min(WRITE_CHUNK, n_samples - start)
+            block = np.empty((n, len(names)))
+            block[:, 0] = top + step * np.arange(start, start + n)
+            block[:, 1:] = rng.normal(size=(n, len(names) - 1))
+            if 'GRZ' in names:
+                block[:, names.index('GRZ')] = 75 + 30 * block[:, names.index('GRZ')]
+            if 'PORD' in names:
+                block[:, names.index('PORD')] = 0.15 + 0.05 * block[:, names.index('PORD')]
+            if 'ZDEN' in names:
+                block[:, names.index('ZDEN')] = 2.4 + 0.1 * block[:, names.index('ZDEN')]
+            nulls = rng.random((n, len(names) - 1)) < null_fraction
+            block[:, 1:][nulls] = np.nan
+            write_las_rows(f, block.T, -999.25)
+    return names
+
+
+def measure(func, repeat=1, setup=None):
+    # (best seconds, peak traced bytes, last result) over repeat runs. Timed
+    # runs have tracemalloc off since its hooks slow every allocation; the
+    # peak comes from one extra traced run. setup() runs untimed before each
+    # run, e.g. to undo what a one-shot stage built.
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def bench_size(path, n_samples, file_bytes, repeat, queries, pixels, seed):
+    results = []
+
+    def record(stage, seconds, peak, items, unit):
+        results.append({
+            'stage': stage, 'samples': n_samples, 'seconds': seconds,
+            'throughput': items / seconds if seconds > 0 else None,
+            'throughput_unit': unit, 'peak_bytes': peak,
+        })
+
+    def parse():
+        data = LasData()
+        data.load(path)
+        return data
+
+    seconds, peak, data = measure(parse, repeat)
+    record('parse', seconds, peak, file_bytes / 1e6, 'MB/s')
+
+    cache_dir = tempfile.mkdtemp(prefix='petro_bench_cache_')
+    try:
+        cache = LasCache(cache_dir)
+        seconds, peak, _ = measure(lambda: LasData(cache).load(path), 1, cache.clear)
+        record('parse+cache_store', seconds, peak, file_bytes / 1e6, 'MB/s')
+        seconds, peak, _ = measure(lambda: LasData(cache).load(path), repeat)
+        record('cache_load', seconds, peak, file_bytes / 1e6, 'MB/s')
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    rng = np.random.default_rng(seed)
+    lo, hi = np.nanmin(data.depth), np.nanmax(data.depth)
+    starts = rng.uniform(lo, hi, queries)
+    ends = starts + rng.uniform(0, hi - lo, queries) / 4
+
+    def reset_tables():
+        # Drop the statistics and drawing tables so they are built again
+        data.set_curves({name: data.curve(name) for name in data.curve_names})
+
+    seconds, peak, _ = measure(lambda: data.stats(lo, hi, LasData.PLOT_CURVES), 1, reset_tables)
+    record('stats_build', seconds, peak, n_samples / 1e6, 'Msamples/s')
+
+    def windows():
+        for s, e in zip(starts, ends):
+            data.window(s, e)
+    seconds, peak, _ = measure(windows, repeat)
+    record('window_query', seconds, peak, queries, 'queries/s')
+
+    def stats_single():
+        for s, e in zip(starts, ends):
+            data.stats(s, e, LasData.PLOT_CURVES)
+    seconds, peak, _ = measure(stats_single, repeat)
+    record('stats_query', seconds, peak, queries, 'queries/s')
+
+    seconds, peak, _ = measure(lambda: data.stats(starts, ends, LasData.PLOT_CURVES), repeat)
+    record('stats_batch', seconds, peak, queries, 'intervals/s')
+
+    def lod_build():
+        # The drawing pyramid alone; the statistics tables are timed in stats_build
+        return LodPyramid(data.depth, {name: data.curve(name) for name in LasData.PLOT_CURVES
+                                       if name in data.store})
+    seconds, peak, _ = measure(lod_build, repeat)
+    record('lod_build', seconds, peak, n_samples / 1e6, 'Msamples/s')
+    # draw_prep times queries only, so build the well's own tables first
+    data.prepare(LasData.PLOT_CURVES)
+
+    def draw_prep():
+        # What a track redraw does minus the GL upload: decimate and fill
+        # float32 vertex buffers
+        buffer = np.empty((4 * pixels, 2), dtype=np.float32)
+        for s, e in zip(starts, ends):
+            for pos in data.decimated(s, e, pixels, LasData.PLOT_CURVES).values():
+                if len(pos) > len(buffer):
+                    buffer = np.empty((len(pos), 2), dtype=np.float32)
+                buffer[:len(pos)] = pos
+    seconds, peak, _ = measure(draw_prep, repeat)
+    record('draw_prep', seconds, peak, queries, 'frames/s')
+
+    seconds, peak, _ = measure(lambda: derive_curves(data), repeat)
+    record('derive_curves', seconds, peak, n_samples / 1e6, 'Msamples/s')
+    return results
+
+
+def compare(results, previous, tolerance):
+    # Print throughput ratios against a previous run (so runs with different
+    # --queries or --repeat still line up); returns the regressions
+    before = {(r['stage'], r['samples']): r for r in previous.get('results', [])}
+    regressions = []
+    for r in results:
+        old = before.get((r['stage'], r['samples']))
+        if old is None or not old['throughput'] or not r['throughput']:
+            continue
+        ratio = r['throughput'] / old['throughput']
+        flag = ''
+        if ratio < 1 / (1 + tolerance):
+            flag = '  REGRESSION'
+            regressions.append(r)
+        print(f"{r['stage']:>18} {r['samples']:>10}  {old['throughput']:.1f} -> "
+              f"{r['throughput']:.1f} {r['throughput_unit']}  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark LAS parsing, queries and draw preparation.')
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma-separated sample counts (e.g. 10000,...,10000000)')
+    parser.add_argument('--curves', type=int, default=8, help='curves per file including DEPT')
+    parser.add_argument('--nulls', type=float, default=0.02, help='fraction of NULL values')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage (best is kept)')
+    parser.add_argument('--queries', type=int, default=200, help='depth windows per query stage')
+    parser.add_argument('--pixels', type=int, default=800, help='track height for draw preparation')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='bench.json', help='JSON results file')
+    parser.add_argument('--compare', help='previous JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='slowdown ratio flagged as a regression')
+    parser.add_argument('--keep-files', help='directory to keep the generated LAS files in')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    workdir = args.keep_files or tempfile.mkdtemp(prefix='petro_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    try:
+        for n in sizes:
+            path = os.path.join(workdir, f'synthetic_{n}_{args.curves}.las')
+            if not os.path.exists(path):
+                write_synthetic_las(path, n, args.curves, args.nulls, seed=args.seed)
+            size = os.path.getsize(path)
+            print(f"{n} samples, {args.curves} curves, {size / 1e6:.1f} MB")
+            for r in bench_size(path, n, size, args.repeat, args.queries, args.pixels, args.seed):
+                results.append(r)
+                rate = f"{r['throughput']:.1f} {r['throughput_unit']}" if r['throughput'] else '-'
+                print(f"  {r['stage']:>18}  {r['seconds']:.4f}s  {rate:>22}  peak {r['peak_bytes'] / 1e6:.1f} MB")
+    finally:
+        if not args.keep_files:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'curves': args.curves, 'nulls': args.nulls, 'repeat': args.repeat,
+            'queries': args.queries, 'pixels': args.pixels,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if compare(results, previous, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import numpy as np
+
+# Mnemonics that name the same measurement across vendors. The first entry is
+# the name the rest of the application uses.
+ALIASES = [
+    ['DEPT', 'DEPTH', 'MD', 'DEP'],
+    ['GRZ', 'GR', 'GRC', 'SGR', 'GAM'],
+    ['PORD', 'DPHI', 'DPOR', 'DPHZ'],
+    ['ZDEN', 'RHOB', 'RHOZ', 'DEN', 'DENS'],
+    ['NPHI', 'NPOR', 'TNPH', 'CNC'],
+    ['RT', 'ILD', 'RILD', 'LLD', 'AT90', 'RDEP'],
+    ['DT', 'DTC', 'AC', 'DTCO'],
+]
+_ALIAS_GROUP = {name: group for group in ALIASES for name in group}
+
+
+def resolve_mnemonic(name, available):
+    # Return the mnemonic in `available` that matches name directly or via
+    # an alias, or None. A repeated mnemonic (GR:1, GR:2) matches its first run.
+    name = name.upper()
+    for candidate in [name] + _ALIAS_GROUP.get(name, []):
+        if candidate in available:
+            return candidate
+    for candidate in [name] + _ALIAS_GROUP.get(name, []):
+        if f'{candidate}:1' in available:
+            return f'{candidate}:1'
+    return None
+
+
+class CurveStore:
+    """Curves of one well held as rows of a single 2-D array.
+
+    Loaded curves share one contiguous ``(n_curves, n_samples)`` block, so
+    opening a file with many curves is a single allocation (or a single memory
+    map). Curves added later, such as derived ones, are kept as extra blocks.
+    Lookups accept aliases, e.g. ``store['GR']`` finds a GRZ curve.
+    """
+
+    def __init__(self, names=(), data=None):
+        self.names = []
+        self._rows = {}
+        self.n_samples = 0
+        if data is not None:
+            self.add_block(names, data)
+
+    def add_block(self, names, data):
+        if data.ndim != 2 or data.shape[0] != len(names):
+            raise ValueError('Curve block must have one row per name')
+        if self.names and data.shape[1] != self.n_samples:
+            raise ValueError('Curve block does not match the number of samples')
+        self.n_samples = data.shape[1]
+        for row, name in enumerate(names):
+            name = name.upper()
+            if name not in self._rows:
+                self.names.append(name)
+            self._rows[name] = (data, row)
+
+    def add(self, name, values):
+        self.add_block([name], np.asarray(values)[None, :])
+
+    def resolve(self, name):
+        return resolve_mnemonic(name, self._rows)
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def __getitem__(self, name):
+        resolved = self.resolve(name)
+        if resolved is None:
+            raise KeyError(name)
+        data, row = self._rows[resolved]
+        return data[row]
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def reorder(self, order):
+        # Apply a row ordering (e.g. sort by depth) to every block, once
+        blocks = {}
+        for name, (data, row) in self._rows.items():
+            if id(data) not in blocks:
+                blocks[id(data)] = data[:, order]
+            self._rows[name] = (blocks[id(data)], row)
+
+    @property
+    def nbytes(self):
+        return sum(data.nbytes for data in self._blocks())
+
+    @property
+    def resident_nbytes(self):
+        # Bytes held in process memory; memory-mapped blocks live in the OS
+        # page cache, are shared between processes and can be dropped at will
+        return sum(data.nbytes for data in self._blocks() if not isinstance(data, np.memmap))
+
+    def _blocks(self):
+        return list({id(data): data for data, _ in self._rows.values()}.values())
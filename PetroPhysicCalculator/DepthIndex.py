@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class DepthIndex:
+    """Depth lookup built once per file.
+
+    Depth windows resolve to contiguous slices with ``searchsorted`` and a
+    prefix count of fully valid rows tells whether a slice needs NaN masking
+    at all.
+    """
+
+    def __init__(self, depth, valid):
+        # depth must already be sorted ascending with NaNs at the end
+        self.depth = depth
+        self.n_finite = int(np.count_nonzero(~np.isnan(depth)))
+        self.valid_prefix = np.zeros(len(depth) + 1, dtype=np.int64)
+        np.cumsum(valid, out=self.valid_prefix[1:])
+
+    @staticmethod
+    def ordering(depth):
+        # Return the indexer that sorts rows by depth: None when the file is
+        # already ascending, a reversing slice when it is descending, and an
+        # argsort otherwise.
+        if len(depth) < 2 or np.isnan(depth).any():
+            return None if len(depth) < 2 else np.argsort(depth, kind='stable')
+        steps = np.diff(depth)
+        if (steps >= 0).all():
+            return None
+        if (steps <= 0).all():
+            return slice(None, None, -1)
+        return np.argsort(depth, kind='stable')
+
+    def window(self, start, end):
+        # Slice covering start <= depth <= end
+        i, j = self.bounds(start, end)
+        return slice(int(i), int(j))
+
+    def bounds(self, start, end):
+        # Row bounds [i, j) for scalar or array depth ranges
+        depth = self.depth[:self.n_finite]
+        i = np.searchsorted(depth, start, side='left')
+        j = np.searchsorted(depth, end, side='right')
+        return i, np.maximum(i, j)
+
+    def valid_count(self, window):
+        return int(self.valid_prefix[window.stop] - self.valid_prefix[window.start])
+
+    def all_valid(self, window):
+        return self.valid_count(window) == window.stop - window.start
@@ -0,0 +1,220 @@
+import os
+import json
+import numpy as np
+
+# Export of a depth window or a whole well, derived curves included, to LAS
+# 2.0, CSV, Parquet (with pyarrow) or a directory of .npy columns. Rows are
+# written chunk by chunk, and each text chunk is formatted with a single
+# %-operation over the flattened values instead of per-row Python code, so
+# memory stays flat however long or wide the log is.
+
+CHUNK_CELLS = 1000000  # values per chunk; rows per chunk shrink as curves are added
+FORMATS = {'.las': 'las', '.csv': 'csv', '.parquet': 'parquet'}
+
+
+def export_format(filename):
+    # Output format from the extension; anything else is a .npy directory
+    return FORMATS.get(os.path.splitext(filename)[1].lower(), 'npy')
+
+
+def export(las_data, filename, start_depth=None, end_depth=None, curves=None, valid_only=False,
+           precision=4, chunk_rows=None, progress=None):
+    # Write depth plus curves (default: every stored curve) for
+    # start_depth <= depth <= end_depth, or the whole well. With valid_only,
+    # rows that are not plotted are dropped like in LasData.window.
+    # progress(rows_done, rows_total) is called after every chunk; chunks
+    # hold about CHUNK_CELLS values unless chunk_rows is given. Returns the
+    # number of rows written.
+    if las_data.index is None:
+        raise ValueError("No LAS data to export")
+    depth_name = las_data.store.resolve(las_data.DEPTH) or las_data.curve_names[0]
+    names = [n for n in (curves if curves is not None else las_data.curve_names)
+             if n in las_data.store and las_data.store.resolve(n) != depth_name]
+    if start_depth is None:
+        window = slice(0, las_data.index.n_finite)
+    else:
+        window = las_data.index.window(start_depth, end_depth)
+    if chunk_rows is None:
+        chunk_rows = max(1, CHUNK_CELLS // (len(names) + 1))
+    rows = _Rows(las_data, names, window, valid_only, chunk_rows)
+
+    fmt = export_format(filename)
+    columns = [las_data.DEPTH] + [n.upper() for n in names]
+    if fmt == 'las':
+        _write_las(las_data, filename, columns, rows, precision, progress)
+    elif fmt == 'csv':
+        _write_csv(filename, columns, rows, precision, progress)
+    elif fmt == 'parquet':
+        _write_parquet(filename, columns, rows, progress)
+    else:
+        _write_npy(las_data, filename, columns, rows, progress)
+    return rows.total
+
+
+class _Rows:
+    # The exported rows as (n_columns, rows) float64 chunks, depth first
+
+    def __init__(self, las_data, names, window, valid_only, chunk_rows):
+        self.las_data = las_data
+        self.names = names
+        self.window = window
+        self.valid_only = valid_only
+        self.chunk_rows = chunk_rows
+        if valid_only:
+            self.total = las_data.index.valid_count(window)
+        else:
+            self.total = window.stop - window.start
+
+    def _ranges(self):
+        for a in range(self.window.start, self.window.stop, self.chunk_rows):
+            b = min(a + self.chunk_rows, self.window.stop)
+            yield a, b, (self.las_data.valid[a:b] if self.valid_only else slice(None))
+
+    def depths(self):
+        for a, b, keep in self._ranges():
+            yield self.las_data.depth[a:b][keep]
+
+    def __iter__(self):
+        for a, b, keep in self._ranges():
+            block = np.empty((len(self.names) + 1, b - a))
+            block[0] = self.las_data.depth[a:b]
+            for k, name in enumerate(self.names):
+                block[k + 1] = self.las_data.curve(name)[a:b]
+            if self.valid_only:
+                block = block[:, keep]
+            if block.shape[1]:
+                yield block
+
+    def depth_range(self):
+        # (start, stop, step) for the LAS header; step is 0 unless all rows
+        # are evenly spaced. Only reads depth, one chunk at a time.
+        start = stop = previous = None
+        step = None
+        regular = True
+        for d in self.depths():
+            if not len(d):
+                continue
+            if start is None:
+                start = d[0]
+                if len(d) > 1:
+                    step = d[1] - d[0]
+            elif step is None:
+                step = d[0] - previous
+            if step is not None and regular:
+                gaps = np.diff(d) if previous is None else np.diff(np.append(previous, d))
+                regular = np.allclose(gaps, step, rtol=0, atol=1e-6 * max(abs(step), 1.0))
+            previous = stop = d[-1]
+        if start is None:
+            return 0.0, 0.0, 0.0
+        return start, stop, step if step is not None and regular else 0.0
+
+
+def _row_format(n_columns, precision, sep):
+    return sep.join([f'%.{precision}f'] * n_columns) + '\n'
+
+
+def _format(block, row_format):
+    # One %-operation per chunk: the row format repeated for every row
+    return (row_format * block.shape[1]) % tuple(block.T.ravel().tolist())
+
+
+def write_las_header(f, columns, units, well, null_value, start, stop, step, precision=4, well_units=None):
+    # The ~V, ~W and ~C sections and the ~A line of a LAS 2.0 file. units
+    # maps columns (depth first) to units; well items other than
+    # STRT/STOP/STEP/NULL are written with their unit from well_units.
+    unit = units.get(columns[0], '')
+    well_units = well_units or {}
+    f.write('~Version Information\n'
+            ' VERS.                 2.0 : CWLS LOG ASCII STANDARD - VERSION 2.0\n'
+            ' WRAP.                  NO : One line per depth step\n'
+            '~Well Information\n'
+            f' STRT.{unit}  {start:.{precision}f} : START DEPTH\n'
+            f' STOP.{unit}  {stop:.{precision}f} : STOP DEPTH\n'
+            f' STEP.{unit}  {step:.{precision}f} : STEP\n'
+            f' NULL.  {null_value} : NULL VALUE\n')
+    for mnemonic, value in well.items():
+        if mnemonic not in ('STRT', 'STOP', 'STEP', 'NULL'):
+            f.write(f' {mnemonic}.{well_units.get(mnemonic, "")}  {value} : {mnemonic}\n')
+    f.write('~Curve Information\n')
+    for name in columns:
+        f.write(f' {name}.{units.get(name, "")}  : {name}\n')
+    f.write('~A  ' + '  '.join(columns) + '\n')
+
+
+def write_las_rows(f, block, null_value, precision=4):
+    # One (n_columns, rows) chunk of the ~A section; NaNs in block are
+    # replaced by null_value in place
+    block[np.isnan(block)] = null_value
+    f.write(_format(block, _row_format(block.shape[0], precision, ' ')))
+
+
+def _write_las(las_data, filename, columns, rows, precision, progress):
+    start, stop, step = rows.depth_range()
+    units = {name: las_data.units.get(name, '') for name in columns}
+    units[columns[0]] = las_data.depth_unit
+    with open(filename, 'w') as f:
+        write_las_header(f, columns, units, las_data.well, las_data.null_value, start, stop, step,
+                         precision, las_data.well_units)
+        done = 0
+        for block in rows:
+            write_las_rows(f, block, las_data.null_value, precision)
+            done += block.shape[1]
+            if progress is not None:
+                progress(done, rows.total)
+
+
+def _write_csv(filename, columns, rows, precision, progress):
+    row_format = _row_format(len(columns), precision, ',')
+    done = 0
+    with open(filename, 'w', newline='') as f:
+        f.write(','.join(columns) + '\n')
+        for block in rows:
+            # Missing values become empty fields
+            f.write(_format(block, row_format).replace('nan', ''))
+            done += block.shape[1]
+            if progress is not None:
+                progress(done, rows.total)
+
+
+def _write_parquet(filename, columns, rows, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError('Writing Parquet requires pyarrow (pip install pyarrow)')
+    schema = pa.schema([(name, pa.float64()) for name in columns])
+    done = 0
+    with pq.ParquetWriter(filename, schema) as writer:
+        # One row group per chunk
+        for block in rows:
+            writer.write_table(pa.Table.from_arrays(list(block), schema=schema))
+            done += block.shape[1]
+            if progress is not None:
+                progress(done, rows.total)
+
+
+def _write_npy(las_data, directory, columns, rows, progress):
+    # One memory-mapped .npy per column plus header.json, like the LAS cache;
+    # np.load(..., mmap_mode='r') reads a single curve without the rest
+    os.makedirs(directory, exist_ok=True)
+    dtypes = [np.float64] + [las_data.curve(n).dtype for n in rows.names]
+    files = [name.replace(os.sep, '_') + '.npy' for name in columns]
+    outputs = [np.lib.format.open_memmap(os.path.join(directory, file), mode='w+', dtype=dtype,
+                                         shape=(rows.total,))
+               for file, dtype in zip(files, dtypes)]
+    done = 0
+    for block in rows:
+        n = block.shape[1]
+        for output, values in zip(outputs, block):
+            output[done:done + n] = values
+        done += n
+        if progress is not None:
+            progress(done, rows.total)
+    for output in outputs:
+        output.flush()
+    del outputs
+    header = {'curves': columns, 'files': files, 'rows': rows.total, 'null_value': las_data.null_value,
+              'well': las_data.well, 'well_units': las_data.well_units, 'units': {name: las_data.units.get(name, '') for name in columns}}
+    header['units'][las_data.DEPTH] = las_data.depth_unit
+    with open(os.path.join(directory, 'header.json'), 'w') as f:
+        json.dump(header, f, indent=1)
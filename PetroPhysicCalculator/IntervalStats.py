@@ -0,0 +1,132 @@
+import numpy as np
+
+
+class IntervalStats:
+    """Constant-time statistics over row intervals of a set of curves.
+
+    Prefix sums of values, squares and valid counts give count/mean/std for
+    any interval from two lookups. Min/max use a sparse table over fixed-size
+    blocks plus a bounded scan of the two partial edge blocks. Every query
+    accepts scalars or arrays of interval bounds, so many zones are answered
+    in one vectorized call.
+    """
+
+    BLOCK = 64
+
+    def __init__(self, curves, valid=None):
+        # curves: {name: 1-D array}; valid: optional row mask applied to all
+        self.names = list(curves)
+        self._tables = {name: self._build(values, valid) for name, values in curves.items()}
+
+    def _build(self, values, valid):
+        B = self.BLOCK
+        n = len(values)
+        n_blocks = -(-n // B)
+        # NaN-padded copy so edge-block gathers never run off the end; it
+        # keeps the curve's dtype, the running sums are always float64
+        x = np.full(n_blocks * B + B, np.nan, dtype=np.result_type(values.dtype, np.float32))
+        x[:n] = values
+        if valid is not None:
+            x[:n][~valid] = np.nan
+        finite = ~np.isnan(x[:n])
+
+        # Shift by the mean so the sum of squares keeps its precision
+        shift = float(np.mean(x[:n][finite], dtype=np.float64)) if finite.any() else 0.0
+        centered = np.where(finite, x[:n] - np.float64(shift), 0.0)
+        csum = np.zeros(n + 1)
+        np.cumsum(centered, out=csum[1:])
+        np.square(centered, out=centered)
+        csq = np.zeros(n + 1)
+        np.cumsum(centered, out=csq[1:])
+        del centered
+        count = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(finite, out=count[1:])
+
+        blocks = x[:n_blocks * B].reshape(n_blocks, B)
+        return {
+            'x': x, 'shift': shift, 'csum': csum, 'csq': csq, 'count': count,
+            'min': self._sparse_table(np.fmin.reduce(blocks, axis=1), np.fmin),
+            'max': self._sparse_table(np.fmax.reduce(blocks, axis=1), np.fmax),
+        }
+
+    def add(self, name, values, valid=None):
+        # Track another curve of the same length, e.g. a derived one
+        self._tables[name] = self._build(values, valid)
+        if name not in self.names:
+            self.names.append(name)
+
+    @staticmethod
+    def _sparse_table(level, op):
+        # table[k, b] = op over blocks [b, b + 2**k)
+        levels = [level]
+        width = 1
+        while 2 * width <= len(level):
+            prev = levels[-1]
+            levels.append(op(prev[:len(prev) - width], prev[width:]))
+            width *= 2
+        table = np.full((len(levels), len(level)), np.nan)
+        for k, row in enumerate(levels):
+            table[k, :len(row)] = row
+        return table
+
+    @property
+    def nbytes(self):
+        return sum(v.nbytes for t in self._tables.values() for v in t.values()
+                   if isinstance(v, np.ndarray))
+
+    def query(self, start, stop, names=None):
+        # Statistics for rows [start, stop); returns {curve: {stat: value}}
+        start = np.asarray(start, dtype=np.int64)
+        stop = np.maximum(np.asarray(stop, dtype=np.int64), start)
+        if names is None:
+            names = self.names
+        return {name: self._query(self._tables[name], start, stop) for name in names}
+
+    def _query(self, t, start, stop):
+        count = t['count'][stop] - t['count'][start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_c = (t['csum'][stop] - t['csum'][start]) / count
+            var = (t['csq'][stop] - t['csq'][start]) / count - mean_c * mean_c
+            # np.where always returns an array; [()] unwraps scalar queries
+            # to a NumPy scalar like the other statistics
+            std = np.where(count > 1, np.sqrt(np.maximum(var, 0.0)), np.where(count == 1, 0.0, np.nan))[()]
+        return {
+            'count': count,
+            'mean': mean_c + t['shift'],
+            'std': std,
+            'min': self._extreme(t, t['min'], np.fmin, start, stop),
+            'max': self._extreme(t, t['max'], np.fmax, start, stop),
+        }
+
+    def _extreme(self, t, table, op, start, stop):
+        B = self.BLOCK
+        scalar = start.ndim == 0
+        start, stop = np.atleast_1d(start), np.atleast_1d(stop)
+        empty = stop <= start
+        last = np.maximum(stop - 1, start)
+        first_block, last_block = start // B, last // B
+
+        # Partial first and last blocks: gather B rows each and mask to range
+        offsets = np.arange(B)
+        left = first_block[:, None] * B + offsets
+        right = last_block[:, None] * B + offsets
+        result = op(self._masked_reduce(t['x'], left, start, stop, op),
+                    self._masked_reduce(t['x'], right, start, stop, op))
+
+        # Whole blocks strictly between them come from the sparse table
+        inner = last_block - first_block - 1
+        has_inner = inner > 0
+        if has_inner.any():
+            lo = first_block[has_inner] + 1
+            span = inner[has_inner]
+            k = np.floor(np.log2(span)).astype(np.int64)
+            hi = lo + span - (1 << k)
+            result[has_inner] = op(result[has_inner], op(table[k, lo], table[k, hi]))
+
+        result[empty] = np.nan
+        return result[0] if scalar else result
+
+    @staticmethod
+    def _masked_reduce(x, rows, start, stop, op):
+        inside = (rows >= start[:, None]) & (rows < stop[:, None])
+        return op.reduce(np.where(inside, x[rows], np.nan), axis=1)
@@ -0,0 +1,141 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from CurveStore import resolve_mnemonic
+
+
+class LasCache:
+    """On-disk cache of parsed LAS curves.
+
+    Each entry is a directory holding a small ``header.json`` with the well
+    metadata, a ``curves.npy`` block with one row per curve and, when the
+    depth curve is kept apart from it, a float64 ``depth.npy``. A file has one
+    entry per storage dtype, so float32 and float64 readers do not overwrite
+    each other. The block is
+    returned as a read-only memory map, so a cache hit costs no parsing and no
+    up-front allocation.
+    """
+
+    DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+    SAMPLE_BYTES = 64 * 1024  # bytes hashed from the start and end of a file
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        if directory is None:
+            directory = os.environ.get('PETRO_CACHE_DIR') or os.path.join(
+                os.path.expanduser('~'), '.cache', 'petrophysic_calculator')
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, filename, dtype=np.float64):
+        # Path, size and mtime catch ordinary edits; the content sample guards
+        # against tools that rewrite files while preserving the mtime.
+        path = os.path.realpath(filename)
+        stat = os.stat(path)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f'{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0{np.dtype(dtype).str}'.encode())
+        with open(path, 'rb') as f:
+            h.update(f.read(self.SAMPLE_BYTES))
+            if stat.st_size > 2 * self.SAMPLE_BYTES:
+                f.seek(-self.SAMPLE_BYTES, os.SEEK_END)
+                h.update(f.read(self.SAMPLE_BYTES))
+        return h.hexdigest()
+
+    def load(self, filename, curves=None, dtype=np.float64):
+        # Return (header, names, block, depth) with block a read-only memmap
+        # of shape (len(names), n_samples) and depth a float64 memmap (None if
+        # none was stored; its name is header['depth']), or None when the
+        # entry is missing, holds a different dtype or lacks a requested curve
+        # (curves=None means every curve in the file).
+        entry = self._entry_dir(self.key(filename, dtype))
+        header = self._read_header(entry)
+        if header is None or header.get('dtype') != np.dtype(dtype).str:
+            return None
+        if curves is None:
+            if not header.get('complete'):
+                return None
+        elif any(resolve_mnemonic(c, header['curves'] + [header.get('depth')]) is None for c in curves):
+            return None
+        try:
+            block = np.load(os.path.join(entry, 'curves.npy'), mmap_mode='r')
+            depth = np.load(os.path.join(entry, 'depth.npy'), mmap_mode='r') if header.get('depth') else None
+        except (OSError, ValueError):
+            return None
+        os.utime(os.path.join(entry, 'header.json'))  # mark as recently used
+        return header, header['curves'], block, depth
+
+    def store(self, filename, header, names, block, complete=False, depth=None):
+        # Replace the entry for filename and block's dtype with a
+        # (len(names), n_samples) block, plus depth (named header['depth'])
+        # if given; complete marks that every curve of the file is included.
+        # A complete entry is never replaced by a partial one.
+        entry = self._entry_dir(self.key(filename, block.dtype))
+        existing = self._read_header(entry)
+        if not complete and existing is not None and existing.get('complete'):
+            return
+        os.makedirs(entry, exist_ok=True)
+        tmp = os.path.join(entry, 'curves.npy.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(block))
+        os.replace(tmp, os.path.join(entry, 'curves.npy'))
+        if depth is not None:
+            tmp = os.path.join(entry, 'depth.npy.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, np.asarray(depth, dtype=np.float64))
+            os.replace(tmp, os.path.join(entry, 'depth.npy'))
+
+        header = dict(header)
+        header['curves'] = list(names)
+        header['complete'] = complete
+        header['dtype'] = block.dtype.str
+        header['source'] = os.path.realpath(filename)
+        tmp = os.path.join(entry, 'header.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(header, f)
+        os.replace(tmp, os.path.join(entry, 'header.json'))
+        self.evict()
+
+    def evict(self, max_bytes=None):
+        # Drop least recently used entries until the cache fits in max_bytes
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = []
+        total = 0
+        for entry in self._entries():
+            size = sum(e.stat().st_size for e in os.scandir(entry) if e.is_file())
+            total += size
+            try:
+                used = os.path.getmtime(os.path.join(entry, 'header.json'))
+            except OSError:
+                # No header yet: the entry is still being written
+                continue
+            entries.append((used, size, entry))
+        for used, size, entry in sorted(entries):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        self.evict(max_bytes=0)
+
+    def size(self):
+        return sum(e.stat().st_size for entry in self._entries()
+                   for e in os.scandir(entry) if e.is_file())
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [e.path for e in os.scandir(self.directory) if e.is_dir()]
+
+    def _entry_dir(self, key):
+        return os.path.join(self.directory, key)
+
+    @staticmethod
+    def _read_header(entry):
+        try:
+            with open(os.path.join(entry, 'header.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
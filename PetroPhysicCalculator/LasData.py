@@ -1,22 +1,290 @@
+import threading
 import numpy as np
-import lasio
+from LasReader import LasReader
+from CurveStore import CurveStore, resolve_mnemonic
+from DepthIndex import DepthIndex
+from IntervalStats import IntervalStats
+from LodPyramid import LodPyramid
+from Tracer import tracer
 
 class LasData:
-    def __init__(self):
+    DEPTH = 'DEPT'
+    # Curves drawn in the tracks; with plot_rows a row is used only if all of them are valid
+    PLOT_CURVES = ['GRZ', 'PORD', 'ZDEN']
+
+    def __init__(self, cache=None, curves=None, dtype=np.float64, plot_rows=False):
+        self.store = CurveStore()
         self.depth = np.array([])
-        self.grz = np.array([])
-        self.pord = np.array([])
-        self.zden = np.array([])
         self.null_value = -999.25
+        self.well = {}
+        self.well_units = {}  # ~W mnemonic -> unit
+        self.params = {}  # ~P section parameters, e.g. RW
+        self.units = {}  # curve mnemonic -> unit from the ~C section
+        self.cache = cache  # optional LasCache
+        self.curves = curves  # mnemonics to load (aliases allowed); None loads all
+        self.dtype = np.dtype(dtype)  # storage type of the curves, e.g. float32 to halve memory; depth is always float64
+        # The GUI drops rows where any plotted curve is null from windows,
+        # statistics and drawing; otherwise each curve skips only its own nulls
+        self.plot_rows = plot_rows
+        self.index = None
+        self.interval_stats = None
+        self._lod = None
+        self._valid = None
+        self._mask = None  # row mask applied to stats and drawing tables (plot_rows only)
+        # Tables are built lazily on first use, possibly from several threads
+        self._tables_lock = threading.RLock()
+
+    @property
+    def grz(self):
+        return self.curve('GRZ')
+
+    @property
+    def pord(self):
+        return self.curve('PORD')
+
+    @property
+    def zden(self):
+        return self.curve('ZDEN')
+
+    @property
+    def curve_names(self):
+        return list(self.store.names)
+
+    @property
+    def nbytes(self):
+        # Process memory held by the curves and the tables built on them
+        total = self.store.resident_nbytes
+        if self.index is not None:
+            total += self.index.valid_prefix.nbytes + self._valid.nbytes + self.interval_stats.nbytes
+            if self.depth.base is None:
+                total += self.depth.nbytes
+        if self._lod is not None:
+            total += self._lod.nbytes
+        return total
+
+    @property
+    def valid(self):
+        # Rows that are plotted and summarised: finite depth, plus all plotted
+        # curves valid with plot_rows
+        return self._valid
+
+    @property
+    def depth_unit(self):
+        name = self.store.resolve(self.DEPTH) or (self.store.names[0] if self.store.names else None)
+        return self.units.get(name, '')
+
+    def curve(self, name):
+        # Curve by mnemonic or alias; empty if the file does not have it
+        return self.store.get(name, np.array([], dtype=self.dtype))
 
     def read_las_file(self, filename):
         try:
-            las = lasio.read(filename)
-            self.depth = np.where(las['DEPT'] == self.null_value, np.nan, las['DEPT'])
-            self.grz = np.where(las['GRZ'] == self.null_value, np.nan, las['GRZ'])
-            self.pord = np.where(las['PORD'] == self.null_value, np.nan, las['PORD'])
-            self.zden = np.where(las['ZDEN'] == self.null_value, np.nan, las['ZDEN'])
+            self.load(filename)
         except Exception as e:
             print(f"Error reading LAS file: {e}")
             # Reset data if the file is not read properly
-            self.__init__()
+            self.__init__(self.cache, self.curves, self.dtype, self.plot_rows)
+
+    def load(self, filename, progress=None):
+        # Like read_las_file, but errors (including LoadCancelled raised via
+        # progress) propagate to the caller. See LasReader.read_block for progress.
+        with tracer.span('load', 'io', file=filename):
+            self.set_block(*self._load_block(filename, progress))
+
+    def set_curves(self, curves):
+        # Replace the data with {mnemonic: array}. The depth curve is DEPT (or
+        # an alias), otherwise the first curve as in LAS.
+        names = list(curves)
+        depth_name = resolve_mnemonic(self.DEPTH, names) or names[0]
+        names.remove(depth_name)
+        depth = np.asarray(curves[depth_name], dtype=np.float64)
+        block = np.empty((len(names), len(depth)), dtype=self.dtype)
+        for row, name in enumerate(names):
+            block[row] = curves[name]
+        self.set_block(names, block, depth_name, depth)
+
+    def set_block(self, names, block, depth_name=None, depth=None):
+        # Replace the data with a (len(names), n_samples) block. Depth is given
+        # separately in float64 (named depth_name) so storing the curves as
+        # float32 does not round sample positions; without it the depth curve
+        # is DEPT (or an alias) in block, otherwise the first curve as in LAS.
+        if depth is None:
+            self.store = CurveStore(names, block)
+            depth_name = self.store.resolve(self.DEPTH) or self.store.names[0]
+        else:
+            self.store = CurveStore([depth_name], np.asarray(depth, dtype=np.float64)[None, :])
+            self.store.add_block(names, block)
+        depth = self.store[depth_name].astype(np.float64, copy=False)
+        order = DepthIndex.ordering(depth)
+        if order is not None:
+            self.store.reorder(order)
+            depth = depth[order]
+        self.depth = depth
+
+        valid = ~np.isnan(depth)
+        if self.plot_rows:
+            for name in self.PLOT_CURVES:
+                if name in self.store:
+                    valid &= ~np.isnan(self.store[name])
+        self.index = DepthIndex(depth, valid)
+        self._valid = valid
+        self._mask = valid if self.plot_rows else None
+        # With plot_rows statistics follow the plotted rows, i.e. only fully
+        # valid samples. Per-curve tables are built on first use.
+        self.interval_stats = IntervalStats({'DEPT': depth}, self._mask)
+        self._lod = None
+
+    def add_curve(self, name, values):
+        # Register a curve aligned with depth, e.g. a derived one, so it gets
+        # statistics and decimation like the loaded ones
+        if self.index is None or len(values) != len(self.depth):
+            raise ValueError(f"Curve {name} does not match the loaded depth samples")
+        name = name.upper()
+        self.store.add(name, values)
+        if name in self.interval_stats.names:
+            self.interval_stats.add(name, values, self._mask)
+        if self._lod is not None and name in self._lod.curves:
+            self._lod.add(name, values, self._mask)
+
+    def _resolve(self, curves):
+        # [(requested name, stored name)] for the curves that exist
+        if curves is None:
+            return [(name, name) for name in self.store.names]
+        pairs = []
+        for name in curves:
+            if name.upper() == self.DEPTH:
+                pairs.append((name, self.DEPTH))
+            elif name in self.store:
+                pairs.append((name, self.store.resolve(name)))
+        return pairs
+
+    def window(self, start_depth, end_depth, curves=None):
+        # {curve: array} for start_depth <= depth <= end_depth; with plot_rows,
+        # rows that are not plotted are dropped. Fully valid windows are
+        # returned as views without copying. Defaults to depth plus the
+        # plotted curves.
+        if curves is None:
+            curves = [self.DEPTH] + self.PLOT_CURVES
+        if self.index is None:
+            return {name: np.array([]) for name in curves}
+        with tracer.span('window', 'query'):
+            window = self.index.window(start_depth, end_depth)
+            arrays = {name: (self.depth if stored == self.DEPTH else self.store[stored])[window]
+                      for name, stored in self._resolve(curves)}
+            if self.index.all_valid(window):
+                return arrays
+            valid = self._valid[window]
+            return {name: a[valid] for name, a in arrays.items()}
+
+    def stats(self, start_depth, end_depth, curves=None):
+        # {curve: {count, mean, std, min, max}} for start_depth <= depth <= end_depth.
+        # Depths may be arrays to evaluate many intervals at once. DEPT is
+        # always included.
+        if self.index is None:
+            return {}
+        pairs = self._resolve(curves)
+        if self.DEPTH not in [stored for _, stored in pairs]:
+            pairs.append((self.DEPTH, self.DEPTH))
+        with tracer.span('stats', 'query'):
+            for _, stored in pairs:
+                self._ensure_stats(stored)
+            i, j = self.index.bounds(start_depth, end_depth)
+            result = self.interval_stats.query(i, j, [stored for _, stored in pairs])
+            return {name: result[stored] for name, stored in pairs}
+
+    @property
+    def lod(self):
+        # The decimation pyramid is only needed for drawing, so headless users
+        # never pay for it. Curves are added on first use.
+        if self._lod is None and self.index is not None:
+            with self._tables_lock:
+                if self._lod is None:
+                    self._lod = LodPyramid(self.depth, {})
+        return self._lod
+
+    def decimated(self, start_depth, end_depth, pixels, curves=None):
+        # {curve: (N, 2) array of (value, depth)} with about 2 vertices per
+        # pixel row, preserving the min/max of every bucket
+        if self.lod is None:
+            return {}
+        with tracer.span('decimate', 'query', pixels=pixels):
+            window = self.index.window(start_depth, end_depth)
+            result = {}
+            for name, stored in self._resolve(curves):
+                if stored == self.DEPTH:
+                    continue
+                self._ensure_lod(stored)
+                result[name] = self.lod.vertices(stored, window, pixels)
+            return result
+
+    def prepare(self, curves):
+        # Build the statistics and drawing tables for curves up front (e.g.
+        # on a loader thread) instead of on their first query
+        if self.index is None:
+            return
+        for _, stored in self._resolve(curves):
+            self._ensure_stats(stored)
+            if stored != self.DEPTH:
+                self._ensure_lod(stored)
+
+    def _ensure_stats(self, stored):
+        if stored not in self.interval_stats.names:
+            with self._tables_lock:
+                if stored not in self.interval_stats.names:
+                    self.interval_stats.add(stored, self.store[stored], self._mask)
+
+    def _ensure_lod(self, stored):
+        if stored not in self.lod.curves:
+            with self._tables_lock:
+                if stored not in self.lod.curves:
+                    self.lod.add(stored, self.store[stored], self._mask)
+
+    def _load_block(self, filename, progress=None):
+        if self.cache is not None:
+            with tracer.span('cache_load', 'io'):
+                cached = self.cache.load(filename, self.curves, self.dtype)
+            if cached is not None and cached[3] is not None:
+                header, names, block, depth = cached
+                self.null_value = header['null_value']
+                self.well = header['well']
+                self.well_units = header.get('well_units', {})
+                self.params = header.get('params', {})
+                self.units = header.get('units', {})
+                if progress is not None:
+                    progress(1, 1, {header['depth']: depth, **dict(zip(names, block))})
+                return names, block, header['depth'], depth
+
+        # Only the requested curves are parsed; nulls come back as NaN. Curves
+        # the file lacks are skipped, but there must be a depth curve.
+        reader = LasReader(filename)
+        depth_name = resolve_mnemonic(self.DEPTH, reader.curve_names) or reader.curve_names[0]
+        if self.curves is None:
+            names = list(reader.curve_names)
+        else:
+            names = [resolve_mnemonic(c, reader.curve_names) for c in self.curves]
+            names = [n for n in dict.fromkeys(names) if n is not None]
+        # Depth is parsed apart from the curves so it stays float64
+        names = [n for n in names if n != depth_name]
+        with tracer.span('parse', 'io', curves=len(names) + 1):
+            depth, names, block = reader.read_well(depth_name, names, progress, self.dtype)
+        self.null_value = reader.null_value
+        self.well = reader.well
+        self.well_units = reader.well_units
+        self.params = reader.params
+        self.units = dict(zip(reader.curve_names, reader.curve_units))
+        if self.cache is not None:
+            try:
+                with tracer.span('cache_store', 'io'):
+                    self.cache.store(filename, {'null_value': self.null_value, 'well': self.well,
+                                                'well_units': self.well_units, 'params': self.params,
+                                                'units': self.units,
+                                                'depth': depth_name},
+                                     names, block, complete=self.curves is None, depth=depth)
+                # Continue from the memory-mapped copy so the parsed block can
+                # be freed and the pages shared with other readers
+                cached = self.cache.load(filename, self.curves, self.dtype)
+                if cached is not None and cached[3] is not None:
+                    names, block, depth_name, depth = cached[1], cached[2], cached[0]['depth'], cached[3]
+            except OSError as e:
+                print(f"Could not cache LAS file: {e}")
+        return names, block, depth_name, depth
@@ -0,0 +1,123 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from LasData import LasData
+from CurveStore import resolve_mnemonic
+from LasReader import LoadCancelled
+from Petrophysics import derive_curves
+from Tracer import tracer
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, loader, generation, filename):
+        super().__init__()
+        self.loader = loader
+        self.generation = generation
+        self.filename = filename
+        self.preview_sent = False
+
+    def run(self):
+        data = LasData(cache=self.loader.cache, plot_rows=self.loader.plot_rows)
+        try:
+            with tracer.span('load_file', 'io', file=self.filename):
+                data.load(self.filename, self.on_progress)
+                with tracer.span('derive_curves'):
+                    derived = derive_curves(data)
+                    for name, values in derived.items():
+                        data.add_curve(name, values)
+                # Build the tables for what the window shows here rather than on first draw
+                with tracer.span('prepare'):
+                    data.prepare(LasData.PLOT_CURVES + list(derived))
+        except LoadCancelled:
+            # cancel() has already told the UI
+            return
+        except Exception as e:
+            self.loader._failed.emit(self.generation, str(e))
+            return
+        self.loader._finished.emit(self.generation, data)
+
+    def on_progress(self, done, total, partial):
+        if self.loader.is_stale(self.generation):
+            return False
+        self.loader._progress.emit(self.generation, int(100 * done / max(total, 1)))
+
+        # Show the first chunk while the rest of the file is still parsing
+        depth = partial[resolve_mnemonic(LasData.DEPTH, partial) or next(iter(partial))]
+        if not self.preview_sent and len(depth) > 1 and done < total:
+            self.preview_sent = True
+            preview = LasData(plot_rows=self.loader.plot_rows)
+            try:
+                preview.set_curves(partial)  # copies the rows
+            except Exception:
+                return True
+            self.loader._preview.emit(self.generation, preview)
+        return True
+
+
+class LasLoader(QObject):
+    """Loads LAS files on a worker thread.
+
+    Emits ``progress`` (percent of the file parsed), ``preview`` with a
+    LasData holding the first parsed chunk, then ``finished`` with the full
+    LasData, ``failed`` with an error message, or ``cancelled``.
+    """
+
+    progress = Signal(int)
+    preview = Signal(object)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    _progress = Signal(int, int)
+    _preview = Signal(int, object)
+    _finished = Signal(int, object)
+    _failed = Signal(int, str)
+
+    def __init__(self, cache=None, plot_rows=False, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.plot_rows = plot_rows  # see LasData
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+        self.loading = False
+        # Private signals carry the generation so results of a superseded
+        # load never reach the public ones.
+        self._progress.connect(self._on_progress)
+        self._preview.connect(self._on_preview)
+        self._finished.connect(self._on_finished)
+        self._failed.connect(self._on_failed)
+
+    def load(self, filename):
+        self.pool.clear()
+        self.generation += 1
+        self.loading = True
+        self.pool.start(_LoadTask(self, self.generation, filename))
+
+    def cancel(self):
+        # The running task notices at its next chunk and stops parsing;
+        # a load that has not started yet is dropped from the queue
+        self.pool.clear()
+        if self.loading:
+            self.generation += 1
+            self.loading = False
+            self.cancelled.emit()
+
+    def is_stale(self, generation):
+        return generation != self.generation
+
+    def _on_progress(self, generation, percent):
+        if not self.is_stale(generation):
+            self.progress.emit(percent)
+
+    def _on_preview(self, generation, data):
+        if not self.is_stale(generation):
+            self.preview.emit(data)
+
+    def _on_finished(self, generation, data):
+        if not self.is_stale(generation):
+            self.loading = False
+            self.finished.emit(data)
+
+    def _on_failed(self, generation, message):
+        if not self.is_stale(generation):
+            self.loading = False
+            self.failed.emit(message)
@@ -0,0 +1,235 @@
+import os
+import numpy as np
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class LasReader:
+    """Streaming reader for LAS 1.2/2.0 files.
+
+    The header sections are parsed line by line and the ~A data block is read
+    in fixed-size chunks, so only the requested curves are ever held in memory.
+    """
+
+    DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024  # bytes of ~A text parsed per step
+
+    def __init__(self, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.version = None
+        self.wrap = False
+        self.null_value = -999.25
+        self.well = {}
+        self.well_units = {}  # ~W mnemonic -> unit, where one is given
+        self.params = {}  # ~P section, mnemonic -> value text
+        self.curve_names = []
+        self.curve_units = []
+        self.data_offset = 0
+        self.file_size = os.path.getsize(filename)
+        self._read_header()
+
+    def _read_header(self):
+        section = None
+        with open(self.filename, 'rb') as f:
+            while True:
+                raw = f.readline()
+                if not raw:
+                    raise ValueError('No ~A section found')
+                line = raw.decode('latin-1').strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('~'):
+                    section = line[1:2].upper()
+                    if section == 'A':
+                        self.data_offset = f.tell()
+                        break
+                    continue
+                mnemonic, unit, value = self._parse_header_line(line)
+                if section == 'V':
+                    if mnemonic.upper() == 'VERS':
+                        self.version = value
+                    elif mnemonic.upper() == 'WRAP':
+                        self.wrap = value.upper().startswith('Y')
+                elif section == 'W':
+                    self.well[mnemonic.upper()] = value
+                    if unit:
+                        self.well_units[mnemonic.upper()] = unit
+                    if mnemonic.upper() == 'NULL':
+                        try:
+                            self.null_value = float(value)
+                        except ValueError:
+                            pass
+                elif section == 'P':
+                    self.params[mnemonic.upper()] = value
+                elif section == 'C':
+                    self.curve_names.append(mnemonic.upper())
+                    self.curve_units.append(unit)
+
+        if not self.curve_names:
+            raise ValueError('No curves defined in ~C section')
+        self.curve_names = self._unique(self.curve_names)
+
+    @staticmethod
+    def _unique(names):
+        # Repeated mnemonics (e.g. two GR runs) become GR:1, GR:2 as in lasio
+        counts = {}
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+        seen = {}
+        unique = []
+        for name in names:
+            if counts[name] > 1:
+                seen[name] = seen.get(name, 0) + 1
+                name = f'{name}:{seen[name]}'
+            unique.append(name)
+        return unique
+
+    @staticmethod
+    def _parse_header_line(line):
+        # MNEM.UNIT  VALUE : DESCRIPTION
+        name, _, rest = line.partition('.')
+        if rest[:1].isspace():
+            unit = ''
+        else:
+            unit, _, rest = rest.partition(' ')
+        value = rest.rpartition(':')[0] if ':' in rest else rest
+        return name.strip(), unit.strip(), value.strip()
+
+    def read(self, curves=None, progress=None, dtype=np.float64):
+        # Return {mnemonic: array} for the requested curves, with null values
+        # already replaced by NaN. The arrays are rows of one 2-D block.
+        names, block = self.read_block(curves, progress, dtype)
+        return dict(zip(names, block))
+
+    def read_block(self, curves=None, progress=None, dtype=np.float64):
+        # Return (names, block) where block is a C-contiguous (n_curves,
+        # n_samples) array of dtype holding the requested curves.
+        #
+        # progress(bytes_done, bytes_total, rows) is called after every chunk
+        # with views of the rows parsed so far; the views are only valid during
+        # the call. Returning False from it raises LoadCancelled.
+        names, block, _ = self._read(curves, None, progress, dtype)
+        return names, block
+
+    def read_well(self, depth, curves=None, progress=None, dtype=np.float64):
+        # Return (depth_values, names, block) like read_block, but with the
+        # depth curve parsed into its own float64 array, so sample positions
+        # stay exact whatever dtype the other curves are stored in. curves
+        # (default: all) never includes depth; progress rows do.
+        names, block, depth_values = self._read(curves, depth, progress, dtype)
+        return depth_values, names, block
+
+    def _read(self, curves, depth, progress, dtype):
+        if curves is None:
+            curves = self.curve_names
+        curves = list(dict.fromkeys(c.upper() for c in curves))
+        if depth is not None:
+            depth = depth.upper()
+            curves = [c for c in curves if c != depth]
+        missing = [c for c in curves + [depth] if c is not None and c not in self.curve_names]
+        if missing:
+            raise KeyError(f"Curves not found in file: {', '.join(missing)}")
+        if not curves and depth is None:
+            return [], np.empty((0, 0), dtype=dtype), None
+        if self.wrap:
+            block = self._read_wrapped(curves + [depth] if depth is not None else curves)
+            return (curves, block[:len(curves)].astype(dtype),
+                    block[-1].copy() if depth is not None else None)
+
+        position = {name: i for i, name in enumerate(self.curve_names)}
+        columns = [position[c] for c in curves]
+        if depth is not None:
+            columns.append(position[depth])
+        n_cols = len(self.curve_names)
+        # One flat buffer viewed as (n_curves, capacity), so each curve is a
+        # contiguous row and the whole block is a single allocation. Depth,
+        # if separate, has a float64 buffer of its own.
+        buf = np.empty(0, dtype=dtype)
+        out = buf.reshape(len(curves), 0)
+        depth_buf = np.empty(0)
+        depth_out = depth_buf.reshape(1, 0)
+        rows = 0
+        tail = b''
+
+        with open(self.filename, 'rb') as f:
+            f.seek(self.data_offset)
+            while True:
+                chunk = f.read(self.chunk_size)
+                if chunk:
+                    chunk = tail + chunk
+                    cut = chunk.rfind(b'\n') + 1
+                    if cut == 0:
+                        tail = chunk
+                        continue
+                    chunk, tail = chunk[:cut], chunk[cut:]
+                else:
+                    chunk, tail = tail, b''
+                    if not chunk.strip():
+                        break
+
+                block = self._parse_block(chunk, n_cols)[:, columns]
+                n = block.shape[0]
+                block[block == self.null_value] = np.nan
+                if rows + n > out.shape[1]:
+                    capacity = self._capacity(out.shape[1], rows + n, f.tell(), len(chunk) / max(n, 1))
+                    buf, out = self._grow(out, rows, capacity)
+                    if depth is not None:
+                        depth_buf, depth_out = self._grow(depth_out, rows, capacity)
+                out[:, rows:rows + n] = block[:, :len(curves)].T
+                if depth is not None:
+                    depth_out[0, rows:rows + n] = block[:, -1]
+                rows += n
+
+                if progress is not None:
+                    partial = {depth: depth_out[0, :rows]} if depth is not None else {}
+                    partial.update((c, out[i, :rows]) for i, c in enumerate(curves))
+                    if progress(f.tell(), self.file_size, partial) is False:
+                        raise LoadCancelled(self.filename)
+
+        capacity = out.shape[1]
+        del out, depth_out
+        block = self._pack(buf, len(curves), capacity, rows)
+        depth_values = self._pack(depth_buf, 1, capacity, rows)[0] if depth is not None else None
+        return curves, block, depth_values
+
+    def _capacity(self, capacity, needed, position, bytes_per_row):
+        # Size the buffer from the bytes still to be read, so in the common
+        # case the block is allocated once.
+        remaining = max(self.file_size - position, 0)
+        estimate = needed + int(remaining / max(bytes_per_row, 1.0) * 1.05) + 1
+        return max(estimate, int(capacity * 1.5))
+
+    @staticmethod
+    def _grow(out, rows, capacity):
+        buf = np.empty(out.shape[0] * capacity, dtype=out.dtype)
+        grown = buf.reshape(out.shape[0], capacity)
+        grown[:, :rows] = out[:, :rows]
+        return buf, grown
+
+    @staticmethod
+    def _pack(buf, n_curves, capacity, rows):
+        # Pack the rows together and shrink the buffer in place; it is ours,
+        # so no other references exist.
+        for i in range(1, n_curves):
+            buf[i * rows:(i + 1) * rows] = buf[i * capacity:i * capacity + rows]
+        buf.resize(n_curves * rows, refcheck=False)
+        return buf.reshape(n_curves, rows)
+
+    @staticmethod
+    def _parse_block(chunk, n_cols):
+        if b'#' in chunk:
+            chunk = b'\n'.join(l for l in chunk.split(b'\n') if not l.lstrip().startswith(b'#'))
+        values = np.fromstring(chunk.decode('latin-1'), sep=' ')
+        if values.size % n_cols:
+            raise ValueError('Malformed ~A section: row length does not match curve count')
+        return values.reshape(-1, n_cols)
+
+    def _read_wrapped(self, curves):
+        # Wrapped files are rare and not line-oriented; let lasio handle them.
+        import lasio
+        las = lasio.read(self.filename)
+        block = np.array([las[c] for c in curves], dtype=float).reshape(len(curves), -1)
+        block[block == self.null_value] = np.nan
+        return block
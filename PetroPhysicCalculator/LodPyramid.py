@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class LodPyramid:
+    """Min/max decimation pyramid for drawing long log tracks.
+
+    Level k groups the samples into buckets of 2**k rows and keeps each
+    bucket's minimum and maximum, so a window drawn at the coarsest level that
+    still has one bucket per pixel row shows every spike with about two
+    vertices per pixel.
+    """
+
+    def __init__(self, depth, curves, valid=None):
+        # depth must be sorted ascending; curves: {name: array}; valid masks rows
+        self.depth = depth
+        self.curves = {}
+        self.levels = {}
+
+        # Level 0 is the raw data; level k stores buckets of 2**k rows
+        self.depth_levels = [(depth, depth)]
+        while len(self.depth_levels[-1][0]) > 1:
+            top, bottom = self.depth_levels[-1]
+            self.depth_levels.append((self._reduce(top, np.fmin), self._reduce(bottom, np.fmax)))
+        for name, values in curves.items():
+            self.add(name, values, valid)
+
+    def add(self, name, values, valid=None):
+        if valid is not None:
+            values = np.where(valid, values, np.nan)
+        levels = [(values, values)]
+        for _ in range(len(self.depth_levels) - 1):
+            lo, hi = levels[-1]
+            levels.append((self._reduce(lo, np.fmin), self._reduce(hi, np.fmax)))
+        self.levels[name] = levels
+        # Set last: a curve listed here is ready to be drawn
+        self.curves[name] = values
+
+    @property
+    def nbytes(self):
+        # Memory owned by the pyramid; unmasked level-0 curves are the caller's
+        total = sum(top.nbytes + bottom.nbytes for top, bottom in self.depth_levels[1:])
+        for name, levels in self.levels.items():
+            total += sum(lo.nbytes + hi.nbytes for lo, hi in levels[1:])
+            if self.curves[name].base is None:
+                total += self.curves[name].nbytes
+        return total
+
+    @staticmethod
+    def _reduce(values, op):
+        if len(values) % 2:
+            values = np.append(values, np.nan)
+        pairs = values.reshape(-1, 2)
+        return op(pairs[:, 0], pairs[:, 1])
+
+    def level_for(self, n_samples, pixels):
+        # Finest level with at most one bucket per pixel row
+        pixels = max(int(pixels), 1)
+        if n_samples <= 2 * pixels:
+            return 0
+        level = int(np.ceil(np.log2(n_samples / pixels)))
+        return min(max(level, 0), len(self.depth_levels) - 1)
+
+    def vertices(self, name, window, pixels):
+        # (N, 2) array of (value, depth) vertices for rows in window
+        level = self.level_for(window.stop - window.start, pixels)
+        if level == 0:
+            values = self.curves[name][window]
+            depth = self.depth[window]
+            keep = ~np.isnan(values) & ~np.isnan(depth)
+            return np.column_stack((values[keep], depth[keep]))
+
+        size = 1 << level
+        buckets = slice(window.start // size, -(-window.stop // size))
+        top, bottom = (d[buckets] for d in self.depth_levels[level])
+        lo, hi = (v[buckets] for v in self.levels[name][level])
+        keep = ~np.isnan(lo) & ~np.isnan(top)
+        pos = np.empty((2 * np.count_nonzero(keep), 2))
+        pos[0::2, 0] = lo[keep]
+        pos[0::2, 1] = top[keep]
+        pos[1::2, 0] = hi[keep]
+        pos[1::2, 1] = bottom[keep]
+        return pos
@@ -0,0 +1,36 @@
+import numpy as np
+from vispy import scene
+
+
+class LogTrack:
+    """One curve track: a VisPy view with a persistent line visual.
+
+    The line, its vertex buffer and the camera are created once; redraws only
+    copy new vertices into the preallocated buffer and adjust the camera range.
+    """
+
+    def __init__(self, view, color, width=0.5, capacity=4096):
+        self.view = view
+        self.view.camera = 'panzoom'
+        self.buffer = np.zeros((capacity, 2), dtype=np.float32)
+        self.line = scene.visuals.Line(pos=self.buffer[:2], color=color, width=width,
+                                       parent=self.view.scene)
+        self.line.visible = False
+
+    def pixel_height(self):
+        return int(self.view.size[1])
+
+    def set_data(self, pos, x_range, y_range):
+        n = len(pos)
+        if n == 0:
+            self.clear()
+            return
+        if n > len(self.buffer):
+            self.buffer = np.zeros((max(n, 2 * len(self.buffer)), 2), dtype=np.float32)
+        self.buffer[:n] = pos
+        self.line.set_data(pos=self.buffer[:n])
+        self.line.visible = True
+        self.view.camera.set_range(x=x_range, y=y_range)
+
+    def clear(self):
+        self.line.visible = False
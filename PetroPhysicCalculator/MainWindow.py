@@ -1,18 +1,51 @@
+import time
 import numpy as np
-from PySide6 import QtCore, QtWidgets
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSlider, QLabel, 
-    QFileDialog, QLineEdit, QGridLayout
+    QFileDialog, QLineEdit, QGridLayout, QProgressBar, QComboBox, QCheckBox,
+    QTableWidget, QTableWidgetItem, QApplication
 )
 from PySide6.QtCore import Qt
-from vispy import scene
-from vispy.scene import LinePlot, Grid
 from LasData import LasData
+from LasCache import LasCache
+from PlotPipeline import PlotPipeline
+from LasLoader import LasLoader
+from WellSession import WellSession
+from Tracer import tracer
+from Zones import read_tops, zone_table, write_zone_table
+from Export import export
+from Petrophysics import archie_sw
 
 class MainWindow(QWidget):
+    # Curves averaged in the label, when present
+    AVG_CURVES = ['GRZ', 'PORD', 'ZDEN', 'VSH', 'PHIE']
+
     def __init__(self):
         super().__init__()
-        self.las_data = LasData()
+        self.las_cache = LasCache()
+        # Rows with a null in any track are left out of the tracks and averages
+        self.las_data = LasData(cache=self.las_cache, plot_rows=True)
+        # Every opened well stays in the session; least recently used ones are
+        # dropped from memory and reloaded on demand
+        self.wells = WellSession(cache=self.las_cache, plot_rows=True)
+        self.loading_path = None
+        # Depth-window work runs off the UI thread; only the newest result is drawn
+        self.plot_pipeline = PlotPipeline(self.las_data, parent=self)
+        self.plot_pipeline.stats_curves = self.AVG_CURVES
+        self.plot_pipeline.plot_curves = LasData.PLOT_CURVES
+        self.plot_pipeline.result_ready.connect(self.draw_window)
+        # Files are parsed in the background with progress and cancellation
+        self.las_loader = LasLoader(cache=self.las_cache, plot_rows=True, parent=self)
+        self.las_loader.progress.connect(self.on_load_progress)
+        self.las_loader.preview.connect(self.on_load_preview)
+        self.las_loader.finished.connect(self.on_load_finished)
+        self.las_loader.failed.connect(self.on_load_failed)
+        self.las_loader.cancelled.connect(self.on_load_cancelled)
+        self.loaded_las_data = self.las_data
+        self.tops_path = None  # formation tops CSV applied to every well
+        self.zones = None  # zone table of the shown well
+        self._frame_start = None  # first coalesced request of the frame being computed
+        self._draw_start = None
         self.init_ui()
         self.min_depth = 0
         self.max_depth = 0
@@ -21,25 +54,13 @@ class MainWindow(QWidget):
         main_layout = QHBoxLayout(self)  # Main layout is horizontal now
         self.layout = QVBoxLayout(self)
 
-    # Create VisPy canvas for plotting
-        self.canvas = scene.SceneCanvas(keys='interactive')
-        self.view = self.canvas.central_widget.add_view()
-
-    # Add the canvas to the layout
-        self.layout.addWidget(self.canvas.native)
-
-        # Initialize the grid and views
-        self.grid = Grid(parent=self.canvas.scene)
-        self.canvas.central_widget.add_widget(self.grid)
-
-        # Create views for each plot, each in its own row
-        self.grz_view = self.grid.add_view(row=0, col=0, border_color='white')
-        self.pord_view = self.grid.add_view(row=0, col=1, border_color='white')
-        self.zden_view = self.grid.add_view(row=0, col=2, border_color='white')
-
-        print(f'ViewBox: size={self.grz_view.size}, pos={self.grz_view.pos}')
-        print(f'ViewBox: size={self.pord_view.size}, pos={self.pord_view.pos}')
-        print(f'ViewBox: size={self.zden_view.size}, pos={self.zden_view.pos}')
+    # The VisPy canvas is created when the first file is shown (see
+    # init_canvas); until then a placeholder keeps the window cheap to open
+        self.canvas = None
+        self.tracks = {}
+        self.canvas_placeholder = QLabel('Open a LAS file to plot its curves')
+        self.canvas_placeholder.setAlignment(Qt.AlignCenter)
+        self.layout.addWidget(self.canvas_placeholder, 1)
 
         main_layout.addLayout(self.layout)  # Add graph layout to main layout
 
@@ -79,10 +100,75 @@ class MainWindow(QWidget):
         self.open_button.clicked.connect(self.open_las_file)
         controls_layout.addWidget(self.open_button)
 
+        # Switch between wells opened in this session
+        self.well_combo = QComboBox()
+        self.well_combo.currentTextChanged.connect(self.on_well_selected)
+        controls_layout.addWidget(self.well_combo)
+
+        # Load progress and cancel button, shown only while a file is loading
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.hide()
+        controls_layout.addWidget(self.load_progress)
+        self.cancel_load_button = QPushButton('Cancel Loading')
+        self.cancel_load_button.clicked.connect(self.las_loader.cancel)
+        self.cancel_load_button.hide()
+        controls_layout.addWidget(self.cancel_load_button)
+
+        # Export the shown window or the whole well, derived curves included
+        self.export_window_button = QPushButton('Export Window')
+        self.export_window_button.clicked.connect(lambda: self.export_las_data(whole_well=False))
+        controls_layout.addWidget(self.export_window_button)
+        self.export_well_button = QPushButton('Export Well')
+        self.export_well_button.clicked.connect(lambda: self.export_las_data(whole_well=True))
+        controls_layout.addWidget(self.export_well_button)
+
+        # Clear parsed-file cache button
+        self.clear_cache_button = QPushButton('Clear Cache')
+        self.clear_cache_button.clicked.connect(self.las_cache.clear)
+        controls_layout.addWidget(self.clear_cache_button)
+
         # Average values label
         self.avg_label = QLabel('')
         controls_layout.addWidget(self.avg_label)
 
+        # Formation water resistivity for SW and the zones' pay columns; left
+        # blank, RW from the file's ~P section is used
+        rw_layout = QHBoxLayout()
+        rw_layout.addWidget(QLabel('Rw (ohm.m):'))
+        self.rw_edit = QLineEdit()
+        self.rw_edit.setPlaceholderText('from file')
+        self.rw_edit.editingFinished.connect(self.on_rw_edit)
+        rw_layout.addWidget(self.rw_edit)
+        controls_layout.addLayout(rw_layout)
+
+        # Per-zone summary from a formation tops file; double-click a zone to view it
+        self.load_tops_button = QPushButton('Load Tops')
+        self.load_tops_button.clicked.connect(self.open_tops_file)
+        controls_layout.addWidget(self.load_tops_button)
+        self.zone_table_widget = QTableWidget()
+        self.zone_table_widget.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.zone_table_widget.cellDoubleClicked.connect(self.on_zone_double_clicked)
+        self.zone_table_widget.hide()
+        controls_layout.addWidget(self.zone_table_widget)
+        self.export_zones_button = QPushButton('Export Zones')
+        self.export_zones_button.clicked.connect(self.export_zones)
+        self.export_zones_button.hide()
+        controls_layout.addWidget(self.export_zones_button)
+
+        # Profiling overlay: timings are only recorded while it is shown
+        self.profile_checkbox = QCheckBox('Show Profiling')
+        self.profile_checkbox.setChecked(tracer.enabled)
+        self.profile_checkbox.toggled.connect(self.on_profiling_toggled)
+        controls_layout.addWidget(self.profile_checkbox)
+        self.profile_label = QLabel('')
+        self.profile_label.setVisible(tracer.enabled)
+        controls_layout.addWidget(self.profile_label)
+        self.export_trace_button = QPushButton('Export Trace')
+        self.export_trace_button.clicked.connect(self.export_trace)
+        self.export_trace_button.setVisible(tracer.enabled)
+        controls_layout.addWidget(self.export_trace_button)
+
         # Add controls layout to main layout
         main_layout.addLayout(controls_layout)
 
@@ -94,13 +180,131 @@ class MainWindow(QWidget):
 
 
 
+    def init_canvas(self):
+        # VisPy and its GL context are only loaded once there is something to draw
+        if self.canvas is not None:
+            return
+        with tracer.span('init_canvas', 'render'):
+            from vispy import scene
+            from vispy.scene import Grid
+            from LogTrack import LogTrack
+
+            # Create VisPy canvas for plotting
+            self.canvas = scene.SceneCanvas(keys='interactive')
+            self.view = self.canvas.central_widget.add_view()
+
+            # Add the canvas to the layout in place of the placeholder
+            self.layout.replaceWidget(self.canvas_placeholder, self.canvas.native)
+            self.canvas_placeholder.deleteLater()
+            self.canvas_placeholder = None
+
+            # Initialize the grid and views
+            self.grid = Grid(parent=self.canvas.scene)
+            self.canvas.central_widget.add_widget(self.grid)
+
+            # Create views for each plot, each in its own row
+            self.grz_view = self.grid.add_view(row=0, col=0, border_color='white')
+            self.pord_view = self.grid.add_view(row=0, col=1, border_color='white')
+            self.zden_view = self.grid.add_view(row=0, col=2, border_color='white')
+
+            # Time the GL draw itself by bracketing the canvas draw handlers
+            self.canvas.events.draw.connect(self.on_canvas_draw_start, position='first')
+            self.canvas.events.draw.connect(self.on_canvas_draw_end, position='last')
+
+            # Each track keeps its line visual and camera for the life of the window
+            self.grz_track = LogTrack(self.grz_view, color='blue')
+            self.pord_track = LogTrack(self.pord_view, color='green')
+            self.zden_track = LogTrack(self.zden_view, color='red')
+            self.tracks = {'GRZ': self.grz_track, 'PORD': self.pord_track, 'ZDEN': self.zden_track}
+
     def open_las_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, 'Open LAS File', '', 'LAS Files (*.las)')
         if file_path:
-            self.las_data.read_las_file(file_path)
-            self.setup_sliders()
-            self.update_plot()
+            self.start_loading(file_path)
+
+    def start_loading(self, file_path):
+        self.loading_path = file_path
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.cancel_load_button.show()
+        self.las_loader.load(file_path)
+
+    def on_well_selected(self, name):
+        if not name or name not in self.wells:
+            return
+        if self.wells.is_resident(name):
+            self.loaded_las_data = self.wells.get(name)
+            self.show_las_data(self.loaded_las_data)
+        else:
+            self.start_loading(self.wells.paths[name])
+
+    def on_load_progress(self, percent):
+        self.load_progress.setValue(percent)
+
+    def on_load_preview(self, las_data):
+        # Show the first parsed chunk while the rest of the file loads
+        self.show_las_data(las_data)
+
+    def on_load_finished(self, las_data):
+        self.end_loading()
+        self.update_profile_label()
+        self.loaded_las_data = las_data
+        name = self.wells.add(self.loading_path, las_data)
+        self.well_combo.blockSignals(True)
+        if self.well_combo.findText(name) < 0:
+            self.well_combo.addItem(name)
+        self.well_combo.setCurrentText(name)
+        self.well_combo.blockSignals(False)
+        self.show_las_data(las_data)
+
+    def on_load_failed(self, message):
+        print(f"Error reading LAS file: {message}")
+        self.end_loading()
+        self.show_las_data(self.loaded_las_data)
+
+    def on_load_cancelled(self):
+        # Go back to the last fully loaded file if a preview was shown
+        self.end_loading()
+        if self.las_data is not self.loaded_las_data:
+            self.show_las_data(self.loaded_las_data)
+
+    def end_loading(self):
+        self.load_progress.hide()
+        self.cancel_load_button.hide()
+
+    def show_las_data(self, las_data):
+        self.plot_pipeline.cancel()
+        self.las_data = las_data
+        self.plot_pipeline.las_data = las_data
+        if las_data.index is None:
+            self.clear_view()
+            return
+        self.init_canvas()
+        self.setup_sliders()
+        self.update_sw(las_data)
+        self.update_zones()
+        self.update_plot()
     
+    def clear_view(self):
+        # Nothing loaded (e.g. the first file was cancelled after its preview):
+        # drop the tracks, sliders, averages and zone table of the old data
+        for track in self.tracks.values():
+            track.clear()
+        if self.canvas is not None:
+            self.canvas.update()
+        for slider in (self.start_depth_slider, self.end_depth_slider):
+            slider.blockSignals(True)
+            slider.setRange(0, 0)
+            slider.blockSignals(False)
+        self.update_slider_labels()
+        self.min_depth = 0
+        self.max_depth = 0
+        self.avg_label.setText('')
+        self.zones = None
+        self.zone_table_widget.clear()
+        self.zone_table_widget.hide()
+        self.export_zones_button.hide()
+
     def setup_sliders(self):
         scale_factor = 100  # Adjust this based on the expected range of depth values
         min_depth = int(np.nanmin(self.las_data.depth) * scale_factor)
@@ -135,78 +339,192 @@ class MainWindow(QWidget):
         start_depth = self.start_depth_slider.value() / 100.0  # Adjust based on your scaling
         end_depth = self.end_depth_slider.value() / 100.0      # Adjust based on your scaling
 
-        print(f"Updating plot for depth range: {start_depth} to {end_depth}")
-        # Apply the mask for the selected depth range
-        mask = (self.las_data.depth >= start_depth) & (self.las_data.depth <= end_depth)
-        depth_range = self.las_data.depth[mask]
-        grz_range = self.las_data.grz[mask]
-        pord_range = self.las_data.pord[mask]
-        zden_range = self.las_data.zden[mask]
-
-        print(f"Filtered data lengths: Depth-{len(depth_range)}, GRZ-{len(grz_range)}, PORD-{len(pord_range)}, ZDEN-{len(zden_range)}")
-
-        # Filter out non-NaN values
-        valid_data_mask = ~np.isnan(depth_range) & ~np.isnan(grz_range) & ~np.isnan(pord_range) & ~np.isnan(zden_range)
-        depth_clean = depth_range[valid_data_mask]
-        grz_clean = grz_range[valid_data_mask]
-        pord_clean = pord_range[valid_data_mask]
-        zden_clean = zden_range[valid_data_mask]
+        if self.canvas is None:
+            return
+        if tracer.enabled and self._frame_start is None:
+            self._frame_start = time.perf_counter()
+        # Queue the window; rapid slider changes are coalesced into one recompute
+        pixels = self.grz_track.pixel_height() or self.canvas.size[1]
+        self.plot_pipeline.request(start_depth, end_depth, pixels)
+
+    def draw_window(self, result):
+        with tracer.span('render', 'render'):
+            self._draw_window(result)
+        if tracer.enabled:
+            if self._frame_start is not None:
+                # From the first slider change to the tracks being updated
+                tracer.add('frame', self._frame_start, time.perf_counter(), 'render')
+                self._frame_start = None
+            tracer.counter('samples_drawn', samples=sum(len(c) for c in result['curves'].values()))
+            self.update_profile_label()
+
+    def _draw_window(self, result):
+        # Averages and axis ranges within the selected depth range come from prefix sums
+        stats = result['stats']
+        curves = result['curves']
+        if not stats:
+            return
+        # Derived petrophysical curves appear once the full file has been processed
+        text = '\n'.join(f"Avg {name}: {stats[name]['mean']:.2f}" for name in self.AVG_CURVES if name in stats)
+        # Update the average values label
+        self.avg_label.setText(text)
 
         # Scale ZDEN values
         zden_scale_factor = 1  # Adjust this as needed
-        zden_clean_scaled = zden_clean / zden_scale_factor
-
-        # Calculate averages within the selected depth range
-        avg_grz = np.nanmean(grz_clean) if len(grz_clean) > 0 else np.nan
-        avg_pord = np.nanmean(pord_clean) if len(pord_clean) > 0 else np.nan
-        avg_zden = np.nanmean(zden_clean) if len(zden_clean) > 0 else np.nan
-        # Update the average values label
-        self.avg_label.setText(f'Avg GRZ: {avg_grz:.2f}\nAvg PORD: {avg_pord:.2f}\nAvg ZDEN: {avg_zden:.2f}')
-
-
-        # Clear the existing plots from the views
-        for view in [self.grz_view, self.pord_view, self.zden_view]:
-            view.children.clear()
-
-        # Create and add new plots to respective views
-        if len(depth_clean) > 0:
-            grz_plot = LinePlot(np.column_stack((grz_clean, depth_clean)), color='blue', width=0.5)
-            self.grz_view.add(grz_plot)
-
-            pord_plot = LinePlot(np.column_stack((pord_clean, depth_clean)), color='green', width=0.5)
-            self.pord_view.add(pord_plot)
-
-            zden_plot = LinePlot(np.column_stack((zden_clean_scaled, depth_clean)), color='red', width=0.5)
-            self.zden_view.add(zden_plot)
-
-         # Set the correct range for the plots
-        grz_x_min, grz_x_max = np.nanmin(grz_clean), np.nanmax(grz_clean)
-        pord_x_min, pord_x_max = np.nanmin(pord_clean), np.nanmax(pord_clean)
-        zden_x_min, zden_x_max = np.nanmin(zden_clean_scaled), np.nanmax(zden_clean_scaled)
-        y_min, y_max = np.nanmin(depth_clean), np.nanmax(depth_clean)
-
-        self.grz_view.camera = 'panzoom'
-        self.grz_view.camera.set_range(x=(grz_x_min, grz_x_max), y=(y_min, y_max))
-        self.pord_view.camera = 'panzoom'
-        self.pord_view.camera.set_range(x=(pord_x_min, pord_x_max), y=(y_min, y_max))
-        self.zden_view.camera = 'panzoom'
-        self.zden_view.camera.set_range(x=(zden_x_min, zden_x_max), y=(y_min, y_max))
-        
-    # Update canvas
-        self.canvas.app.process_events()
+        if 'ZDEN' in curves:
+            curves['ZDEN'][:, 0] /= zden_scale_factor
+        scale = {'ZDEN': zden_scale_factor}
+
+        # Update the persistent line visuals and their axis ranges; tracks for
+        # curves the file lacks stay empty
+        y_range = (stats['DEPT']['min'], stats['DEPT']['max'])
+        for name, track in self.tracks.items():
+            if stats['DEPT']['count'] > 0 and name in curves:
+                s = scale.get(name, 1)
+                track.set_data(curves[name], (stats[name]['min'] / s, stats[name]['max'] / s), y_range)
+            else:
+                track.clear()
+
+        # Schedule a single redraw; Qt coalesces repeated requests per frame
         self.canvas.update()
-        self.update_slider_labels()
 
     def update_slider_labels(self):
     # Get the slider values as floating-point numbers
         start_depth = self.start_depth_slider.value() / 100.0  # Assuming you've scaled the values by 100
         end_depth = self.end_depth_slider.value() / 100.0      # Adjust the divisor according to your scale factor
 
-        print(f"Debug: Start Depth Slider Value: {self.start_depth_slider.value()}")
-        print(f"Debug: End Depth Slider Value: {self.end_depth_slider.value()}")
-        print(f"Debug: Start Depth: {start_depth}")
-        print(f"Debug: End Depth: {end_depth}")
-
     # Update the labels with the current slider values, formatted to two decimal places
         self.start_depth_label.setText(f'Start Depth: {start_depth:.2f}')
         self.end_depth_label.setText(f'End Depth: {end_depth:.2f}')
+
+    def export_las_data(self, whole_well=False):
+        if self.las_data.index is None:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Export Curves', '',
+            'LAS Files (*.las);;CSV Files (*.csv);;Parquet Files (*.parquet);;NumPy Column Directory (*)')
+        if not file_path:
+            return
+        if whole_well:
+            start_depth = end_depth = None
+        else:
+            start_depth = self.start_depth_slider.value() / 100.0
+            end_depth = self.end_depth_slider.value() / 100.0
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            with tracer.span('export', 'io', file=file_path):
+                export(self.las_data, file_path, start_depth, end_depth)
+        except (OSError, ValueError) as e:
+            print(f"Error exporting curves: {e}")
+        finally:
+            QApplication.restoreOverrideCursor()
+
+    def on_rw_edit(self):
+        if self.las_data.index is not None:
+            self.update_sw(self.las_data)
+            self.update_zones()
+
+    def update_sw(self, las_data):
+        # (Re)derive SW with the Rw typed in; the loader has already used the
+        # file's RW otherwise
+        try:
+            rw = float(self.rw_edit.text())
+        except ValueError:
+            return
+        rt, phie = las_data.curve('RT'), las_data.curve('PHIE')
+        if len(rt) and len(phie):
+            las_data.add_curve('SW', archie_sw(rt, phie, rw))
+
+    def open_tops_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Open Tops File', '', 'CSV Files (*.csv *.txt)')
+        if file_path:
+            self.tops_path = file_path
+            self.update_zones()
+
+    def update_zones(self):
+        # Recomputed for every well shown; rows of other wells in the tops file are skipped
+        if self.tops_path is None or self.las_data.index is None:
+            return
+        well = [self.well_combo.currentText(), self.las_data.well.get('WELL'), self.las_data.well.get('UWI')]
+        try:
+            names, tops, bases = read_tops(self.tops_path, well)
+        except (OSError, ValueError) as e:
+            print(f"Error reading tops file: {e}")
+            return
+        with tracer.span('zones', 'query', zones=len(names)):
+            self.zones = zone_table(self.las_data, names, tops, bases)
+        self.show_zone_table(self.zones)
+
+    def show_zone_table(self, zones):
+        columns = list(zones)
+        table = self.zone_table_widget
+        table.setUpdatesEnabled(False)
+        table.clear()
+        table.setColumnCount(len(columns))
+        table.setRowCount(len(zones['ZONE']))
+        table.setHorizontalHeaderLabels(columns)
+        for c, name in enumerate(columns):
+            for r, value in enumerate(zones[name]):
+                if isinstance(value, str):
+                    text = value
+                elif isinstance(value, (bool, np.bool_)):
+                    text = 'Yes' if value else ''
+                else:
+                    text = f'{value:.2f}'
+                table.setItem(r, c, QTableWidgetItem(text))
+        table.resizeColumnsToContents()
+        table.setUpdatesEnabled(True)
+        table.show()
+        self.export_zones_button.show()
+
+    def on_zone_double_clicked(self, row, column):
+        # Show the zone in the tracks
+        top = max(self.zones['TOP'][row], self.min_depth)
+        base = min(self.zones['BASE'][row], self.max_depth)
+        self.start_depth_slider.setValue(int(top * 100))
+        self.end_depth_slider.setValue(int(base * 100))
+
+    def export_zones(self):
+        if self.zones is None:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Export Zones', 'zones.csv', 'CSV Files (*.csv)')
+        if file_path:
+            try:
+                write_zone_table(self.zones, file_path)
+            except OSError as e:
+                print(f"Error writing zone table: {e}")
+
+    def on_canvas_draw_start(self, event):
+        if tracer.enabled:
+            self._draw_start = time.perf_counter()
+
+    def on_canvas_draw_end(self, event):
+        if tracer.enabled and self._draw_start is not None:
+            tracer.add('gl_draw', self._draw_start, time.perf_counter(), 'render')
+            self._draw_start = None
+
+    def on_profiling_toggled(self, checked):
+        tracer.enable(checked)
+        self._frame_start = None
+        self.profile_label.setVisible(checked)
+        self.export_trace_button.setVisible(checked)
+        self.update_profile_label()
+
+    def update_profile_label(self):
+        if not tracer.enabled:
+            return
+        def ms(name):
+            value = tracer.last(name)
+            return '-' if value is None else f'{value:.1f} ms'
+        samples = tracer.counters.get('samples_drawn', {}).get('samples', 0)
+        self.profile_label.setText(f"Frame: {ms('frame')} (GL {ms('gl_draw')})\n"
+                                   f"Samples drawn: {samples}\n"
+                                   f"Last load: {ms('load_file')}")
+
+    def export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Export Trace', 'trace.json', 'Chrome Trace (*.json)')
+        if file_path:
+            try:
+                tracer.export(file_path)
+            except OSError as e:
+                print(f"Error writing trace: {e}")
@@ -0,0 +1,119 @@
+import numpy as np
+
+# Vectorized petrophysical transforms. Every function works on whole logs,
+# writes into `out` when given and otherwise allocates exactly one result
+# array; no other temporaries are created. Single-input transforms may be
+# applied in place (out=input).
+
+LN2 = np.log(2.0)
+
+
+def _out(values, out):
+    if out is None:
+        values = np.asarray(values)
+        dtype = values.dtype if values.dtype.kind == 'f' else np.float64
+        out = np.empty(values.shape, dtype=dtype)
+    return out
+
+
+def gamma_ray_index(gr, gr_clean, gr_shale, out=None):
+    # IGR = (GR - GRclean) / (GRshale - GRclean), clipped to [0, 1]
+    if gr_shale == gr_clean:
+        raise ValueError(f"GR clean and shale end points are both {gr_clean}")
+    out = _out(gr, out)
+    np.subtract(gr, gr_clean, out=out)
+    np.multiply(out, 1.0 / (gr_shale - gr_clean), out=out)
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+def larionov_vshale(igr, tertiary=True, out=None):
+    # Larionov (1969): 0.083 * (2**(3.7 IGR) - 1) for Tertiary rocks,
+    # 0.33 * (2**(2 IGR) - 1) for older rocks
+    out = _out(igr, out)
+    exponent, scale = (3.7, 0.083) if tertiary else (2.0, 0.33)
+    np.multiply(igr, exponent * LN2, out=out)
+    np.expm1(out, out=out)
+    np.multiply(out, scale, out=out)
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+def density_porosity(rhob, rho_matrix=2.65, rho_fluid=1.0, out=None):
+    # PHID = (rho_ma - RHOB) / (rho_ma - rho_fl)
+    out = _out(rhob, out)
+    np.subtract(rho_matrix, rhob, out=out)
+    np.multiply(out, 1.0 / (rho_matrix - rho_fluid), out=out)
+    return out
+
+
+def effective_porosity(phi, vshale, out=None):
+    # PHIE = PHI * (1 - Vsh), floored at zero
+    out = _out(phi, out)
+    np.subtract(1.0, vshale, out=out)
+    np.multiply(out, phi, out=out)
+    return np.maximum(out, 0.0, out=out)
+
+
+def archie_sw(rt, phi, rw, a=1.0, m=2.0, n=2.0, out=None):
+    # Sw = (a * Rw / (PHI**m * Rt)) ** (1/n), clipped to [0, 1]
+    out = _out(phi, out)
+    np.power(phi, m, out=out)
+    np.multiply(out, rt, out=out)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(a * rw, out, out=out)
+    np.power(out, 1.0 / n, out=out)
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+def parameter(las_data, name):
+    # Numeric ~P parameter of a loaded well, or None
+    try:
+        return float(las_data.params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def derive_curves(las_data, gr_clean=None, gr_shale=None, tertiary=True,
+                  rho_matrix=2.65, rho_fluid=1.0, rw=None, a=1.0, m=2.0, n=2.0):
+    # Derived curves for a loaded LasData: IGR and VSH from GRZ, PHID from
+    # ZDEN, PHIE from both, and SW when the well has a resistivity curve (RT
+    # or an alias) and rw is known (default: the RW parameter of the ~P
+    # section). Curves whose inputs are missing are skipped, as are those
+    # needing IGR when GR is all null or flat. All outputs are rows of one
+    # preallocated block.
+    # GR end points default to the 5th/95th percentiles of GRZ.
+    grz, zden, rt = las_data.curve('GRZ'), las_data.curve('ZDEN'), las_data.curve('RT')
+    if rw is None:
+        rw = parameter(las_data, 'RW')
+    if len(grz) and (gr_clean is None or gr_shale is None):
+        if np.isnan(grz).all():
+            grz = grz[:0]
+        else:
+            p5, p95 = np.nanpercentile(grz, [5, 95])
+            gr_clean = p5 if gr_clean is None else gr_clean
+            gr_shale = p95 if gr_shale is None else gr_shale
+    if len(grz) and gr_shale == gr_clean:
+        grz = grz[:0]
+    names = []
+    if len(grz):
+        names += ['IGR', 'VSH']
+    if len(zden):
+        names += ['PHID']
+    if len(grz) and len(zden):
+        names += ['PHIE']
+        if len(rt) and rw is not None:
+            names += ['SW']
+    if not names:
+        return {}
+    block = np.empty((len(names), len(las_data.depth)), dtype=las_data.dtype)
+    curves = dict(zip(names, block))
+
+    if len(grz):
+        gamma_ray_index(grz, gr_clean, gr_shale, out=curves['IGR'])
+        larionov_vshale(curves['IGR'], tertiary, out=curves['VSH'])
+    if len(zden):
+        density_porosity(zden, rho_matrix, rho_fluid, out=curves['PHID'])
+    if 'PHIE' in curves:
+        effective_porosity(curves['PHID'], curves['VSH'], out=curves['PHIE'])
+    if 'SW' in curves:
+        archie_sw(rt, curves['PHIE'], rw, a, m, n, out=curves['SW'])
+    return curves
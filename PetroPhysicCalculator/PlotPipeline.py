@@ -0,0 +1,104 @@
+import time
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+
+class _WindowTask(QRunnable):
+    def __init__(self, pipeline, generation, las_data, start_depth, end_depth, pixels):
+        super().__init__()
+        self.pipeline = pipeline
+        self.generation = generation
+        self.las_data = las_data
+        self.start_depth = start_depth
+        self.end_depth = end_depth
+        self.pixels = pixels
+
+    def run(self):
+        # Bail out between stages as soon as a newer window has been requested
+        if self.pipeline.is_stale(self.generation):
+            return
+        try:
+            stats = self.las_data.stats(self.start_depth, self.end_depth, self.pipeline.stats_curves)
+            if self.pipeline.is_stale(self.generation):
+                return
+            curves = self.las_data.decimated(self.start_depth, self.end_depth, self.pixels,
+                                             self.pipeline.plot_curves)
+        except Exception as e:
+            # The data may have been replaced under us by a new file; a fresh
+            # request follows the load, so just drop this one.
+            if not self.pipeline.is_stale(self.generation):
+                print(f"Error computing depth window: {e}")
+            return
+        result = {
+            'start_depth': self.start_depth,
+            'end_depth': self.end_depth,
+            'stats': stats,
+            'curves': curves,
+        }
+        self.pipeline._finished.emit(self.generation, result)
+
+
+class PlotPipeline(QObject):
+    """Coalesces depth-window requests and computes them off the UI thread.
+
+    Requests are debounced (the timer restarts on every change) but throttled
+    so a continuous drag still produces a result every ``throttle_ms``. Work
+    runs on a single-thread pool; a newer request cancels queued tasks and
+    makes running ones stop early, and only the newest result is delivered.
+    """
+
+    result_ready = Signal(object)
+    _finished = Signal(int, object)
+
+    def __init__(self, las_data, debounce_ms=15, throttle_ms=50, parent=None):
+        super().__init__(parent)
+        self.las_data = las_data
+        self.throttle_ms = throttle_ms
+        self.stats_curves = None  # curves to summarise (None: all)
+        self.plot_curves = None  # curves to decimate for drawing (None: all)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+        self._pending = None
+        self._pending_since = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._dispatch)
+        self._finished.connect(self._on_finished)
+
+    def request(self, start_depth, end_depth, pixels):
+        self._pending = (start_depth, end_depth, pixels)
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        if (now - self._pending_since) * 1000 >= self.throttle_ms:
+            self._dispatch()
+        else:
+            self._timer.start()
+
+    def cancel(self):
+        # Drop pending and in-flight work, e.g. before the data is replaced
+        self._timer.stop()
+        self._pending = None
+        self._pending_since = None
+        self.generation += 1
+        self.pool.clear()
+
+    def is_stale(self, generation):
+        return generation != self.generation
+
+    def _dispatch(self):
+        self._timer.stop()
+        if self._pending is None:
+            return
+        start_depth, end_depth, pixels = self._pending
+        self._pending = None
+        self._pending_since = None
+        self.generation += 1
+        self.pool.clear()
+        self.pool.start(_WindowTask(self, self.generation, self.las_data,
+                                    start_depth, end_depth, pixels))
+
+    def _on_finished(self, generation, result):
+        if not self.is_stale(generation):
+            self.result_ready.emit(result)
@@ -0,0 +1,121 @@
+import numpy as np
+
+# Depth resampling onto regular grids. Curves are handled as 2-D
+# (n_curves, n_samples) blocks: neighbour indices and weights (or bin edges)
+# are computed once per well from its depth and applied to every curve with
+# one gather, which is the batched equivalent of calling np.interp per curve.
+
+FEET_PER_METRE = 1.0 / 0.3048
+_DEPTH_UNITS = {'FT': 1.0, 'F': 1.0, 'FEET': 1.0, 'M': FEET_PER_METRE, 'METER': FEET_PER_METRE,
+                'METERS': FEET_PER_METRE, 'METRE': FEET_PER_METRE, 'METRES': FEET_PER_METRE}
+
+
+def depth_in(depth, unit, target_unit):
+    # Convert a depth array between feet and metres; unknown units are left as is
+    source = _DEPTH_UNITS.get(unit.upper())
+    target = _DEPTH_UNITS.get(target_unit.upper())
+    if source is None or target is None or source == target:
+        return depth
+    return depth * (source / target)
+
+
+def regular_grid(top, base, step):
+    # Depths top, top + step, ... up to and including base
+    n = int(np.floor((base - top) / step + 1e-9)) + 1
+    return top + step * np.arange(max(n, 0))
+
+
+def resample(depth, values, grid, max_gap=None):
+    # Resample values (n_curves, n_samples) given at ascending depth onto grid.
+    # Grids coarser than the data are block-averaged over each grid cell;
+    # finer or similar grids are linearly interpolated. NaN samples never leak
+    # into neighbours: an interpolated point next to a NaN, or inside a gap
+    # wider than max_gap, is NaN, and an average uses only valid samples.
+    values = np.atleast_2d(values)
+    out = np.full((values.shape[0], len(grid)), np.nan)
+    finite = ~np.isnan(depth)
+    if not finite.all():
+        depth, values = depth[finite], values[:, finite]
+    if len(depth) < 2 or len(grid) == 0:
+        return out
+
+    source_step = float(np.median(np.diff(depth)))
+    grid_step = float(np.median(np.diff(grid))) if len(grid) > 1 else source_step
+    if grid_step > 1.5 * source_step:
+        _block_average(depth, values, grid, grid_step, out)
+    else:
+        _interpolate(depth, values, grid, max_gap, out)
+    return out
+
+
+def _interpolate(depth, values, grid, max_gap, out):
+    right = np.searchsorted(depth, grid, side='left')
+    inside = (grid >= depth[0]) & (grid <= depth[-1])
+    right = np.clip(right, 1, len(depth) - 1)
+    left = right - 1
+    span = depth[right] - depth[left]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(span > 0, (grid - depth[left]) / span, 0.0)
+    # NaN in either neighbour propagates, which is the gap handling we want
+    result = values[:, left] * (1.0 - weight) + values[:, right] * weight
+    # Exact hits on a valid sample keep it even if its neighbour is NaN or
+    # across a gap
+    exact_left = weight == 0.0
+    result[:, exact_left] = values[:, left[exact_left]]
+    exact_right = weight == 1.0
+    result[:, exact_right] = values[:, right[exact_right]]
+    if max_gap is not None:
+        inside &= (span <= max_gap) | exact_left | exact_right
+    out[:, inside] = result[:, inside]
+
+
+def _block_average(depth, values, grid, grid_step, out):
+    # Mean of the valid samples in [g - step/2, g + step/2) from prefix sums
+    edges = np.append(grid - grid_step / 2, grid[-1] + grid_step / 2)
+    bounds = np.searchsorted(depth, edges, side='left')
+    lo, hi = bounds[:-1], bounds[1:]
+    valid = ~np.isnan(values)
+    csum = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(np.where(valid, values, 0.0), axis=1, out=csum[:, 1:])
+    count = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.int64)
+    np.cumsum(valid, axis=1, out=count[:, 1:])
+    n = count[:, hi] - count[:, lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(csum[:, hi] - csum[:, lo], n, out=out, where=n > 0)
+
+
+def resample_well(las_data, curves, grid, depth_unit=None, max_gap=None):
+    # (len(curves), len(grid)) array for one LasData; missing curves are NaN.
+    # With depth_unit (e.g. 'FT') the well's depth is converted to it first.
+    depth = las_data.depth
+    if depth_unit is not None:
+        depth = depth_in(depth, las_data.depth_unit, depth_unit)
+    values = np.full((len(curves), len(depth)), np.nan, dtype=las_data.dtype)
+    present = np.zeros(len(curves), dtype=bool)
+    for k, name in enumerate(curves):
+        if name in las_data.store:
+            values[k] = las_data.curve(name)
+            present[k] = True
+    out = resample(depth, values, grid, max_gap)
+    out[~present] = np.nan
+    return out
+
+
+def align_wells(wells, curves, step, top=None, base=None, depth_unit='FT', max_gap=None):
+    # Put many wells on one regular grid in depth_unit. Returns (grid, data)
+    # where data is (n_wells, n_depths) for a single curve name or
+    # (n_wells, n_curves, n_depths) for a list of names. top/base default to
+    # the shallowest/deepest sample over all wells.
+    single = isinstance(curves, str)
+    names = [curves] if single else list(curves)
+    depths = [depth_in(w.depth, w.depth_unit, depth_unit) for w in wells]
+    if top is None:
+        top = min(np.nanmin(d) for d in depths if len(d))
+    if base is None:
+        base = max(np.nanmax(d) for d in depths if len(d))
+    grid = regular_grid(top, base, step)
+
+    data = np.full((len(wells), len(names), len(grid)), np.nan)
+    for i, well in enumerate(wells):
+        data[i] = resample_well(well, names, grid, depth_unit, max_gap)
+    return grid, data[:, 0] if single else data
@@ -0,0 +1,321 @@
+import os
+import sys
+import json
+import math
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from LasData import LasData
+from LasCache import LasCache
+from WellSession import WellSession
+from Petrophysics import derive_curves
+
+# Headless query service: no Qt or VisPy imports. Serves on localhost by default:
+#
+#   python Service.py --port 8765 --root /data/wells
+#   curl 'http://127.0.0.1:8765/stats?file=/data/wells/a.las&start=5000&end=5200&curves=GRZ,PORD'
+#   curl 'http://127.0.0.1:8765/curves?file=/data/wells/a.las&start=5000&end=5200&pixels=800'
+#   curl -d '{"file": "/data/wells/a.las", "intervals": [[5000, 5100], [5100, 5200]]}' \
+#        http://127.0.0.1:8765/stats
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LogService:
+    """Depth-window stats and decimated curves for many clients.
+
+    Parsed wells stay warm in a WellSession under a memory budget, backed by
+    the on-disk LasCache. A well is loaded once however many requests arrive
+    for it at the same time, and reloaded when its file changes. Concurrent stats requests for one file are
+    drained together by a single worker and answered with one vectorized
+    LasData.stats call per curve set.
+    """
+
+    def __init__(self, cache=None, memory_budget=WellSession.DEFAULT_MEMORY_BUDGET, workers=None,
+                 root=None, derived=True):
+        self.session = WellSession(cache=cache if cache is not None else LasCache(),
+                                   memory_budget=memory_budget)
+        self.pool = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1))
+        self.root = os.path.realpath(root) if root else None
+        self.derived = derived  # add VSH/PHIE etc. to every loaded well
+        self._lock = threading.Lock()
+        self._loading = {}  # path -> Future of the LasData being loaded
+        self._pending = {}  # path -> [(kind, args, Future)] waiting for a worker
+        self._draining = set()  # paths with a drain scheduled or running
+        self._sources = {}  # path -> (size, mtime) of the file its resident well was read from
+
+    def resolve_path(self, filename):
+        if not filename:
+            raise ServiceError(400, "Missing 'file'")
+        path = os.path.realpath(filename)
+        if self.root is not None and os.path.commonpath([self.root, path]) != self.root:
+            raise ServiceError(403, f"{filename} is outside the served directory")
+        if not os.path.isfile(path):
+            raise ServiceError(404, f"No such file: {filename}")
+        return path
+
+    def stats(self, filename, starts, ends, curves=None):
+        # Future of {curve: {stat: list}} with one entry per interval
+        return self._submit(self.resolve_path(filename), 'stats', (starts, ends, curves))
+
+    def curves(self, filename, start, end, pixels, curves=None):
+        # Future of {curve: (N, 2) array of (value, depth)}
+        return self._submit(self.resolve_path(filename), 'curves', (start, end, pixels, curves))
+
+    def wells(self):
+        return {'wells': self.session.names,
+                'resident': [n for n in self.session.names if self.session.is_resident(n)],
+                'resident_bytes': self.session.resident_bytes}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, path, kind, args):
+        future = Future()
+        with self._lock:
+            self._pending.setdefault(path, []).append((kind, args, future))
+            # At most one drain per file; a running one picks this up next
+            if path not in self._draining:
+                self._draining.add(path)
+                self.pool.submit(self._drain, path)
+        return future
+
+    def _drain(self, path):
+        # Answer everything queued for path, batch by batch, until none is left
+        while True:
+            with self._lock:
+                requests = self._pending.pop(path, None)
+                if not requests:
+                    self._draining.discard(path)
+                    return
+            self._answer_batch(path, requests)
+
+    def _answer_batch(self, path, requests):
+        try:
+            las_data = self._well(path)
+        except Exception as e:
+            for _, _, future in requests:
+                future.set_exception(e)
+            return
+
+        # All stats requests with the same curves become one array query
+        groups = {}
+        for kind, args, future in requests:
+            if kind == 'stats':
+                starts, ends, curves = args
+                groups.setdefault(tuple(curves) if curves else None, []).append((starts, ends, future))
+            else:
+                start, end, pixels, curves = args
+                self._answer(future, las_data.decimated, start, end, pixels, curves)
+        for curves, batch in groups.items():
+            sizes = [len(starts) for starts, _, _ in batch]
+            starts = np.concatenate([s for s, _, _ in batch])
+            ends = np.concatenate([e for _, e, _ in batch])
+            try:
+                result = las_data.stats(starts, ends, list(curves) if curves else None)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for size, (_, _, future) in zip(sizes, batch):
+                future.set_result({name: {stat: values[offset:offset + size] for stat, values in s.items()}
+                                   for name, s in result.items()})
+                offset += size
+
+    @staticmethod
+    def _answer(future, func, *args):
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    @staticmethod
+    def _source(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _well(self, path):
+        # Resident wells are returned directly unless the file has changed
+        # since they were read; otherwise one caller loads the file and
+        # everyone else asking for it meanwhile waits for that load
+        source = self._source(path)
+        with self._lock:
+            if self.session.is_resident(path):
+                if self._sources.get(path) == source:
+                    return self.session.get(path)
+                self.session.release(path)
+            loading = self._loading.get(path)
+            owner = loading is None
+            if owner:
+                loading = self._loading[path] = Future()
+        if not owner:
+            return loading.result()
+        try:
+            # Per-curve nulls only, so answers do not depend on other curves
+            las_data = LasData(cache=self.session.cache, plot_rows=False)
+            las_data.load(path)
+            if self.derived:
+                for name, values in derive_curves(las_data).items():
+                    las_data.add_curve(name, values)
+            # Eviction only happens under our lock, so the is_resident/get
+            # pair above cannot have the well dropped in between
+            with self._lock:
+                self.session.add(path, las_data, name=path)
+                # Taken before reading, so a change during the load is seen next time
+                self._sources[path] = source
+            loading.set_result(las_data)
+            return las_data
+        except Exception as e:
+            loading.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(path, None)
+
+
+def _jsonable(value):
+    # numpy results to JSON; NaN (e.g. empty intervals) becomes null
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None  # set by serve()
+    timeout_s = 120
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self._handle(url.path, query)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._reply(400, {'error': 'Body must be JSON'})
+        if not isinstance(body, dict):
+            return self._reply(400, {'error': 'Body must be a JSON object'})
+        self._handle(url.path, body)
+
+    def _handle(self, route, params):
+        try:
+            if route == '/health':
+                return self._reply(200, {'status': 'ok'})
+            if route == '/wells':
+                return self._reply(200, self.service.wells())
+            if route == '/stats':
+                starts, ends = self._intervals(params)
+                future = self.service.stats(params.get('file'), starts, ends, self._curves(params))
+                result = future.result(self.timeout_s)
+                if 'intervals' not in params:
+                    # Single interval: plain numbers instead of one-element lists
+                    result = {name: {stat: v[0] for stat, v in s.items()} for name, s in result.items()}
+                return self._reply(200, result)
+            if route == '/curves':
+                start, end = self._number(params, 'start'), self._number(params, 'end')
+                future = self.service.curves(params.get('file'), start, end,
+                                             self._number(params, 'pixels', int, 800), self._curves(params))
+                return self._reply(200, future.result(self.timeout_s))
+            return self._reply(404, {'error': f'Unknown path {route}'})
+        except ServiceError as e:
+            self._reply(e.status, {'error': str(e)})
+        except Exception as e:
+            # Parameters are checked above, so anything else is our fault
+            self._reply(500, {'error': str(e)})
+
+    @staticmethod
+    def _number(params, name, kind=float, default=None):
+        value = params.get(name, default)
+        if value is None:
+            raise ServiceError(400, f"Missing '{name}'")
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            raise ServiceError(400, f"'{name}' must be a number, got {value!r}")
+
+    @classmethod
+    def _intervals(cls, params):
+        if 'intervals' in params:
+            try:
+                intervals = np.asarray(params['intervals'], dtype=float).reshape(-1, 2)
+            except (TypeError, ValueError):
+                raise ServiceError(400, "'intervals' must be a list of [top, base] pairs")
+            return intervals[:, 0], intervals[:, 1]
+        return np.array([cls._number(params, 'start')]), np.array([cls._number(params, 'end')])
+
+    @staticmethod
+    def _curves(params):
+        curves = params.get('curves')
+        if isinstance(curves, str):
+            curves = [c for c in curves.split(',') if c]
+        if curves is not None and not (isinstance(curves, list) and all(isinstance(c, str) for c in curves)):
+            raise ServiceError(400, "'curves' must be a list of curve names")
+        return curves or None
+
+    def _reply(self, status, payload):
+        body = json.dumps(_jsonable(payload)).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Quiet by default; clients can be numerous
+        pass
+
+
+def serve(service, host='127.0.0.1', port=8765):
+    # The HTTP server runs one thread per connection; those threads only
+    # parse requests and wait, the work happens on the service's pool
+    handler = type('Handler', (_Handler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve depth-window statistics and decimated curves over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker threads (default: CPUs, up to 8)')
+    parser.add_argument('--memory-budget-mb', type=int, default=1024, help='memory for warm wells')
+    parser.add_argument('--cache-dir', help='parsed-file cache directory')
+    parser.add_argument('--root', help='only serve LAS files under this directory')
+    parser.add_argument('--no-derived', action='store_true', help='do not compute VSH, PHIE and other derived curves')
+    args = parser.parse_args(argv)
+
+    service = LogService(cache=LasCache(args.cache_dir) if args.cache_dir else None,
+                         memory_budget=args.memory_budget_mb * 1024 ** 2, workers=args.workers,
+                         root=args.root, derived=not args.no_derived)
+    server = serve(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
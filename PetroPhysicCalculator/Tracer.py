@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.start, time.perf_counter(), self.cat, self.args)
+        return False
+
+
+class Tracer:
+    """Timing spans for the load, slice, stats and render paths.
+
+    Disabled by default: ``span`` then returns a shared no-op context
+    manager, so instrumented code only pays for one attribute check. When
+    enabled, finished spans are kept in a bounded ring buffer, the last
+    duration of each name is available for display, and everything can be
+    written out in the Chrome trace format (chrome://tracing, Perfetto).
+    Set PETRO_TRACE=1 to enable tracing from the start.
+    """
+
+    def __init__(self, enabled=False, max_events=100000):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.latest = {}  # span name -> last duration in seconds
+        self.counters = {}  # counter name -> last value
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, name, cat='app', **args):
+        # with tracer.span('stats', curves=3): ...
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def add(self, name, start, end, cat='app', args=None):
+        # Record a span measured elsewhere from two time.perf_counter() values
+        self.latest[name] = end - start
+        self.events.append({
+            'name': name, 'cat': cat, 'ph': 'X',
+            'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6,
+            'pid': self._pid, 'tid': threading.get_ident(), 'args': args or {},
+        })
+
+    def counter(self, name, **values):
+        # Counter track in the trace, e.g. samples drawn per frame
+        if not self.enabled:
+            return
+        self.counters[name] = values
+        self.events.append({
+            'name': name, 'ph': 'C', 'ts': (time.perf_counter() - self._origin) * 1e6,
+            'pid': self._pid, 'tid': threading.get_ident(), 'args': values,
+        })
+
+    def last(self, name):
+        # Last duration of a span in milliseconds, or None
+        seconds = self.latest.get(name)
+        return None if seconds is None else seconds * 1000
+
+    def clear(self):
+        self.events.clear()
+        self.latest.clear()
+        self.counters.clear()
+
+    def export(self, filename):
+        events = list(self.events)
+        names = {e['tid'] for e in events}
+        for thread in threading.enumerate():
+            if thread.ident in names:
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': self._pid,
+                                'tid': thread.ident, 'args': {'name': thread.name}})
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+
+# Shared by every module; the GUI turns it on from its profiling checkbox
+tracer = Tracer(enabled=os.environ.get('PETRO_TRACE', '') not in ('', '0'))
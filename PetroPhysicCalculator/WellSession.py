@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from LasData import LasData
+from LasCache import LasCache
+
+
+class WellSession:
+    """A set of wells open side by side under a memory budget.
+
+    Wells are registered by path and only loaded when first asked for. With a
+    LasCache (the default) their curves are memory maps of the cached blocks,
+    shared through the OS page cache with every other process reading the
+    same wells. Loaded wells are kept in least-recently-used order and the
+    oldest are dropped whenever the memory they hold exceeds the budget; a
+    dropped well is reloaded transparently the next time it is requested.
+    """
+
+    DEFAULT_MEMORY_BUDGET = 1024 ** 3
+
+    def __init__(self, cache=None, memory_budget=DEFAULT_MEMORY_BUDGET, curves=None, dtype=np.float64,
+                 plot_rows=False):
+        self.cache = cache if cache is not None else LasCache()
+        self.memory_budget = memory_budget
+        self.curves = curves
+        self.dtype = dtype
+        self.plot_rows = plot_rows  # see LasData
+        self.paths = OrderedDict()  # well name -> LAS path, in registration order
+        self._resident = OrderedDict()  # well name -> LasData, least recently used first
+        self._lock = threading.RLock()
+
+    def register(self, filename, name=None):
+        # Make a well available without loading it; returns its session name
+        if name is None:
+            name = os.path.splitext(os.path.basename(filename))[0]
+        with self._lock:
+            base, n = name, 1
+            while name in self.paths and self.paths[name] != filename:
+                n += 1
+                name = f'{base} ({n})'
+            self.paths[name] = filename
+        return name
+
+    def add(self, filename, las_data, name=None):
+        # Register a well that has already been loaded elsewhere
+        name = self.register(filename, name)
+        with self._lock:
+            self._resident[name] = las_data
+            self._resident.move_to_end(name)
+            self._evict(keep=name)
+        return name
+
+    def remove(self, name):
+        with self._lock:
+            self.paths.pop(name, None)
+            self._resident.pop(name, None)
+
+    def get(self, name):
+        # LasData for a registered well, loading it if it is not resident
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                # Tables built since the last call may have pushed us over
+                self._evict(keep=name)
+                return self._resident[name]
+            las_data = LasData(cache=self.cache, curves=self.curves, dtype=self.dtype,
+                               plot_rows=self.plot_rows)
+            las_data.load(self.paths[name])
+            self._resident[name] = las_data
+            self._evict(keep=name)
+            return las_data
+
+    def is_resident(self, name):
+        return name in self._resident
+
+    def release(self, name):
+        # Drop a well from memory but keep it registered
+        with self._lock:
+            self._resident.pop(name, None)
+
+    @property
+    def names(self):
+        return list(self.paths)
+
+    @property
+    def resident_bytes(self):
+        with self._lock:
+            return sum(d.nbytes for d in self._resident.values())
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, name):
+        return name in self.paths
+
+    def _evict(self, keep=None):
+        total = sum(d.nbytes for d in self._resident.values())
+        for name in list(self._resident):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            total -= self._resident.pop(name).nbytes
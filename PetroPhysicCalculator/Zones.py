@@ -0,0 +1,169 @@
+import csv
+import numpy as np
+
+# Zone (formation tops) tables. Every zone's row range comes from one
+# searchsorted over the tops and bases, and each quantity's sums for all zones
+# come from one prefix sum over the samples, so hundreds of zones cost about
+# the same as one.
+
+# Rows are net reservoir when they pass all net cutoffs and pay when they also
+# pass the pay cutoffs. If the well lacks a cutoff curve the columns that
+# depend on it are left out rather than reported as passing.
+NET_CUTOFFS = {'VSH': ('<=', 0.4), 'PHIE': ('>=', 0.08)}
+PAY_CUTOFFS = {'SW': ('<=', 0.6)}
+
+_NAME_COLUMNS = ['ZONE', 'NAME', 'FORMATION', 'SURFACE', 'TOP_NAME']
+_TOP_COLUMNS = ['TOP', 'DEPTH', 'MD', 'TOP_MD', 'TOP_DEPTH']
+_BASE_COLUMNS = ['BASE', 'BOTTOM', 'BASE_MD', 'BASE_DEPTH']
+_WELL_COLUMNS = ['WELL', 'WELL_NAME', 'UWI']
+_OPERATORS = {'<=': np.less_equal, '<': np.less, '>=': np.greater_equal, '>': np.greater}
+
+
+def _column(header, candidates):
+    for name in candidates:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def read_tops(filename, well=None):
+    # (names, tops, bases) from a tops CSV sorted by top. Columns are found by
+    # header name (zone/name, top/depth, optional base and well); without a
+    # header they are name, top[, base]. A zone without a base ends at the
+    # next top, the last one at the bottom of the well (base = inf). With a
+    # well column, only rows for well (a name or list of names) are kept
+    # unless the file holds a single well.
+    with open(filename, newline='') as f:
+        rows = [row for row in csv.reader(f) if any(cell.strip() for cell in row)]
+    if not rows:
+        return [], np.array([]), np.array([])
+
+    header = [cell.strip().upper() for cell in rows[0]]
+    name_col, top_col = _column(header, _NAME_COLUMNS), _column(header, _TOP_COLUMNS)
+    if top_col is not None:
+        rows = rows[1:]
+        base_col, well_col = _column(header, _BASE_COLUMNS), _column(header, _WELL_COLUMNS)
+        if name_col is None:
+            name_col = 0 if top_col != 0 else None
+    else:
+        name_col, top_col, base_col, well_col = 0, 1, 2, None
+
+    if well_col is not None and well is not None:
+        wells = {w.strip().upper() for w in ([well] if isinstance(well, str) else well) if w}
+        if len({row[well_col].strip().upper() for row in rows if len(row) > well_col}) > 1:
+            rows = [row for row in rows if len(row) > well_col and row[well_col].strip().upper() in wells]
+
+    zones = []
+    for k, row in enumerate(rows):
+        try:
+            top = float(row[top_col])
+        except (ValueError, IndexError):
+            continue
+        try:
+            base = float(row[base_col]) if base_col is not None and row[base_col].strip() else np.nan
+        except (ValueError, IndexError):
+            base = np.nan
+        name = row[name_col].strip() if name_col is not None and len(row) > name_col else f'Zone {k + 1}'
+        zones.append((top, base, name))
+    zones.sort(key=lambda z: z[0])
+
+    names = [z[2] for z in zones]
+    tops = np.array([z[0] for z in zones], dtype=float)
+    bases = np.array([z[1] for z in zones], dtype=float)
+    missing = np.isnan(bases)
+    bases[missing] = np.append(tops[1:], np.inf)[missing]
+    return names, tops, bases
+
+
+def sample_thickness(depth):
+    # Depth interval each sample stands for: half way to each neighbour
+    thickness = np.zeros(len(depth))
+    finite = np.flatnonzero(~np.isnan(depth))
+    if len(finite) < 2:
+        return thickness
+    d = depth[finite]
+    edges = np.empty(len(d) + 1)
+    edges[1:-1] = (d[1:] + d[:-1]) / 2
+    edges[0] = d[0] - (d[1] - d[0]) / 2
+    edges[-1] = d[-1] + (d[-1] - d[-2]) / 2
+    thickness[finite] = np.diff(edges)
+    return thickness
+
+
+def _passes(las_data, cutoffs, n):
+    # Row flag for all cutoffs, or None if a cutoff curve is missing
+    flag = np.ones(n, dtype=bool)
+    for name, (op, value) in cutoffs.items():
+        if name not in las_data.store:
+            return None
+        # NaN compares False, so missing samples never count as net or pay
+        with np.errstate(invalid='ignore'):
+            flag &= _OPERATORS[op](las_data.curve(name), value)
+    return flag
+
+
+def _interval_sums(values, i, j):
+    # Sum of values[i:j] for every (i, j) pair from one prefix sum
+    csum = np.zeros(len(values) + 1)
+    np.cumsum(values, out=csum[1:])
+    return csum[j] - csum[i]
+
+
+def zone_table(las_data, names, tops, bases, curves=None,
+               net_cutoffs=NET_CUTOFFS, pay_cutoffs=PAY_CUTOFFS):
+    # {column: array} with one row per zone: ZONE, TOP, BASE, GROSS, NET, NTG,
+    # PAY, PAY_FLAG and the mean of each curve (default: every curve but
+    # depth). NET/NTG need the net cutoff curves and PAY/PAY_FLAG the pay ones
+    # as well; columns that cannot be evaluated are omitted. Zones are
+    # [top, base); thicknesses are in depth units.
+    tops = np.asarray(tops, dtype=float)
+    bases = np.asarray(bases, dtype=float)
+    table = {'ZONE': list(names), 'TOP': tops, 'BASE': bases}
+    depth = las_data.depth
+    n = len(depth)
+    if curves is None:
+        depth_name = las_data.store.resolve(las_data.DEPTH) or las_data.curve_names[0]
+        curves = [c for c in las_data.curve_names if c != depth_name]
+    curves = [c for c in curves if c in las_data.store]
+
+    # Row bounds of every zone at once; depth is ascending with NaNs last
+    finite = depth[:int(np.count_nonzero(~np.isnan(depth)))]
+    i = np.searchsorted(finite, tops, side='left')
+    j = np.maximum(i, np.searchsorted(finite, bases, side='left'))
+
+    thickness = sample_thickness(depth)
+    gross = _interval_sums(thickness, i, j)
+    table['GROSS'] = gross
+    net = _passes(las_data, net_cutoffs, n)
+    if net is not None:
+        net_thickness = _interval_sums(np.where(net, thickness, 0.0), i, j)
+        table['NET'] = net_thickness
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table['NTG'] = np.where(gross > 0, net_thickness / gross, np.nan)
+        pay = _passes(las_data, pay_cutoffs, n)
+        if pay is not None:
+            pay_thickness = _interval_sums(np.where(net & pay, thickness, 0.0), i, j)
+            table['PAY'] = pay_thickness
+            table['PAY_FLAG'] = pay_thickness > 0
+
+    for name in curves:
+        v = las_data.curve(name)
+        valid = ~np.isnan(v)
+        counts = _interval_sums(valid, i, j)
+        sums = _interval_sums(np.where(valid, v, 0.0), i, j)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        # A curve called like a table column keeps both
+        table[name if name not in table else f'{name}_MEAN'] = means
+    return table
+
+
+def write_zone_table(table, filename):
+    columns = list(table)
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in zip(*(table[c] for c in columns)):
+            writer.writerow([value if isinstance(value, str) else
+                             int(value) if isinstance(value, (bool, np.bool_)) else
+                             f'{value:.10g}' for value in row])